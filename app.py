@@ -59,12 +59,9 @@ from pygame import mixer
 
 # -- dtw --
 import librosa
-import librosa.display
-import matplotlib.pyplot as plt
-from scipy.interpolate.interpolate import interp1d
 
 # -- custom --
-from dtw import DTW, MidiIO
+from dtw import DTW, MidiIO, load_audio, load_chroma, remap_linear
 
 # -- Settings --
 LOAD_SAMPLE_ON_START:bool = False
@@ -177,11 +174,18 @@ class App(tk.Tk):
         except Exception:
             x3 = 0
 
+        x_max:Union[int,float] = max(1, x1, x2, x3)
+
         self.x_min = 0
-        self.x_max = max(1, x1, x2, x3)
+        self.x_max = x_max
 
         self.x_min_glob = 0
-        self.x_max_glob = max(1, x1, x2, x3)
+        self.x_max_glob = x_max
+
+    def redraw_all(self) -> None:
+        """Applies the current x limits to all views and schedules a single repaint per canvas."""
+        for view in (self.view_1, self.view_2, self.view_5, self.view_3, self.view_4):
+            view.reload_axis(idle=True)
 
     def convert_x_pos(self, x) -> Union[int,float]:
         """
@@ -201,6 +205,11 @@ class App(tk.Tk):
 # -------------------------------------------------------------------
 
 class MenuBar(tk.Menu):
+    # -- file dialog filters --
+    DATA_FILETYPES  = (("data files", "*.data *.DATA"), ("All files", "*.*"))
+    AUDIO_FILETYPES = (("audio files", "*.mp3 *.wav"), ("All files", "*.*"))
+    MIDI_FILETYPES  = (("MIDI files", "*.mid *.MID"), ("All files", "*.*"))
+
     def __init__(self, parent:App) -> None:
         # -- init class --
         tk.Menu.__init__(self, parent)
@@ -333,7 +342,7 @@ class MenuBar(tk.Menu):
 
     def load_project(self) -> None:
         # -- load data --
-        filename = filedialog.askopenfilename(initialdir="/", title="Open file", filetypes=(("data files","*.data;*.DATA"),("All files","*.*")))
+        filename = filedialog.askopenfilename(initialdir="/", title="Open file", filetypes=self.DATA_FILETYPES)
         if filename == "":
             print("Cancelled loading project")
             return None
@@ -369,7 +378,7 @@ class MenuBar(tk.Menu):
 
     def save_project_as(self) -> None:
         # -- save data --
-        self.app.project_data.filename = filedialog.asksaveasfilename(initialdir="/", title="Save as", filetypes=(("data files","*.data;*.DATA"),("All files","*.*")))
+        self.app.project_data.filename = filedialog.asksaveasfilename(initialdir="/", title="Save as", filetypes=self.DATA_FILETYPES)
         if self.app.project_data.filename == "":
             print("Cancelled saving project")
             return None
@@ -381,7 +390,7 @@ class MenuBar(tk.Menu):
         """
         # -- save data --
         if self.app.project_data.filename is None:
-            self.app.project_data.filename = filedialog.asksaveasfilename(initialdir="/", title="Save as", filetypes=(("data files","*.data;*.DATA"),("All files","*.*")))
+            self.app.project_data.filename = filedialog.asksaveasfilename(initialdir="/", title="Save as", filetypes=self.DATA_FILETYPES)
             if self.app.project_data.filename == "":
                 print("Cancelled saving project")
                 return None
@@ -393,7 +402,7 @@ class MenuBar(tk.Menu):
 
     def on_open_mp3_original(self) -> None:
         # -- load dataset --
-        filename = filedialog.askopenfilename(initialdir="/", title="Open file", filetypes=(("audio files","*.mp3;*.wav;"),("all files","*.*")))
+        filename = filedialog.askopenfilename(initialdir="/", title="Open file", filetypes=self.AUDIO_FILETYPES)
         
         if filename == "":
             print("Cancelled opening original mp3 file")
@@ -424,7 +433,7 @@ class MenuBar(tk.Menu):
 
     def on_open_mp3_from_midi(self) -> None:
         # -- load dataset --
-        filename = filedialog.askopenfilename(initialdir="/", title="Open file", filetypes=(("audio files","*.mp3;*.wav;"),("all files","*.*")))
+        filename = filedialog.askopenfilename(initialdir="/", title="Open file", filetypes=self.AUDIO_FILETYPES)
         
         if filename == "":
             print("Cancelled opening mp3 from midi")
@@ -452,7 +461,7 @@ class MenuBar(tk.Menu):
         
     def on_open_midi(self) -> None:
         # -- load dataset --
-        filename = filedialog.askopenfilename(initialdir="/", title="Open file", filetypes=(("MIDI files","*.mid;*.MID"),("All files","*.*")))
+        filename = filedialog.askopenfilename(initialdir="/", title="Open file", filetypes=self.MIDI_FILETYPES)
         
         if filename == "":
             print("Cancelled opening midi file")
@@ -479,7 +488,7 @@ class MenuBar(tk.Menu):
     # ---------------------------------------------------------------
 
     def on_save_midi(self) -> None:
-        self.app.data_5.outfile = filedialog.asksaveasfilename(initialdir="/", title="Save as", filetypes=(("MIDI files","*.mid;*.MID"),("All files","*.*")))
+        self.app.data_5.outfile = filedialog.asksaveasfilename(initialdir="/", title="Save as", filetypes=self.MIDI_FILETYPES)
         if self.app.data_5.outfile == "":
             print("Cancelled saving midi file")
             return None
@@ -498,7 +507,7 @@ class MenuBar(tk.Menu):
 
     def apply_dtw_algo(self) -> None:
         # -- compute DTW time mappings --
-        self.app.dtw_obj = DTW(x_raw=self.app.data_1.y, y_raw=self.app.data_2.y, fs=self.app.data_1.fs, df_midi=self.app.data_5.df_midi)
+        self.app.dtw_obj = DTW(x_raw=self.app.data_1.y, y_raw=self.app.data_2.y, fs=self.app.data_1.fs, df_midi=self.app.data_5.df_midi, file_x=self.app.data_1.filename, file_y=self.app.data_2.filename)
         
         if self.app.dtw_enabled is False:
             messagebox.showerror(title="Error", message="DTW is not available for already manipulated data.\nTo run it again, restart the app and load fresh audio + midi data.")
@@ -521,13 +530,13 @@ class MenuBar(tk.Menu):
 
         # -- apply DTW time mappings --
         print("Remapping midi...")
-        self.app.data_5.df_midi["time abs (sec)"] = [self.app.dtw_obj.f(x) for x in self.app.data_5.df_midi["time abs (sec)"]]
+        self.app.data_5.df_midi["time abs (sec)"] = self.app.dtw_obj.f(self.app.data_5.df_midi["time abs (sec)"].to_numpy())
         
         print("Remapping mp3...")
-        self.app.data_2.x_sm = [self.app.dtw_obj.f(x) for x in self.app.data_2.x_sm]
+        self.app.data_2.x_sm = self.app.dtw_obj.f(np.asarray(self.app.data_2.x_sm))
 
         print("Remapping chroma features...")
-        self.app.data_4.x = [self.app.dtw_obj.f(x) for x in self.app.data_4.x]
+        self.app.data_4.x = self.app.dtw_obj.f(np.asarray(self.app.data_4.x))
 
         # -- draw graphs --
         print("Redrawing graphs")
@@ -538,11 +547,7 @@ class MenuBar(tk.Menu):
         # -- trigger axis adjustment --
         print("Resetting axis")
         self.app.reset_bounds()
-        self.app.view_1.reload_axis()
-        self.app.view_2.reload_axis()
-        self.app.view_5.reload_axis()
-        self.app.view_3.reload_axis()
-        self.app.view_4.reload_axis()
+        self.app.redraw_all()
 
         # -- disable dtw --
         self.app.dtw_enabled = False
@@ -629,11 +634,7 @@ class MenuBar(tk.Menu):
         self.app.x_max -= zoom_amount
 
         # -- trigger axis adjustment --
-        self.app.view_1.reload_axis()
-        self.app.view_2.reload_axis()
-        self.app.view_5.reload_axis()
-        self.app.view_3.reload_axis()
-        self.app.view_4.reload_axis()
+        self.app.redraw_all()
 
     def zoom_out(self) -> None:
         # -- adjust x axis limits --
@@ -656,11 +657,7 @@ class MenuBar(tk.Menu):
             pass
 
         # -- trigger axis adjustment --
-        self.app.view_1.reload_axis()
-        self.app.view_2.reload_axis()
-        self.app.view_5.reload_axis()
-        self.app.view_3.reload_axis()
-        self.app.view_4.reload_axis()
+        self.app.redraw_all()
 
     def scroll_right(self) -> None:
         # -- adjust x axis limits --
@@ -678,11 +675,7 @@ class MenuBar(tk.Menu):
             pass
 
         # -- trigger axis adjustment --
-        self.app.view_1.reload_axis()
-        self.app.view_2.reload_axis()
-        self.app.view_5.reload_axis()
-        self.app.view_3.reload_axis()
-        self.app.view_4.reload_axis()
+        self.app.redraw_all()
 
     def scroll_left(self) -> None:
         # -- adjust x axis limits --
@@ -700,11 +693,7 @@ class MenuBar(tk.Menu):
             pass
 
         # -- trigger axis adjustment --
-        self.app.view_1.reload_axis()
-        self.app.view_2.reload_axis()
-        self.app.view_5.reload_axis()
-        self.app.view_3.reload_axis()
-        self.app.view_4.reload_axis()
+        self.app.redraw_all()
 
     # -- PLAY -------------------------------------------------------
 
@@ -1224,16 +1213,14 @@ class Data1():
         self.filename = filename
         try:
             # -- load mp3 --
-            self.y, self.fs = librosa.load(self.filename)
+            self.y, self.fs = load_audio(self.filename)
 
             # -- convert time to seconds for x axis--
-            x_num_steps = len(self.y)
-            time_length = len(self.y) / self.fs
-            self.x = [(i/x_num_steps)*time_length for i in range(x_num_steps)]
+            self.x = np.arange(len(self.y), dtype=np.float32) / np.float32(self.fs)
 
-            # -- create reduced sample for plotting --
+            # -- create reduced sample for plotting -- (x_sm is built directly, no strided copy of x; it gets warped in place)
             self.y_sm = self.y[::self.app.downsampling_factor_1]
-            self.x_sm = self.x[::self.app.downsampling_factor_1]
+            self.x_sm = np.arange(0, len(self.y), self.app.downsampling_factor_1, dtype=np.float32) / np.float32(self.fs)
 
         except Exception as e:
             messagebox.showerror("Error Message", f"Could not load file: {self.filename}, because: {repr(e)}")
@@ -1260,16 +1247,14 @@ class Data2():
         self.filename = filename
         try:
             # -- load mp3 --
-            self.y, self.fs = librosa.load(self.filename)
+            self.y, self.fs = load_audio(self.filename)
 
             # -- convert time to seconds for x axis--
-            x_num_steps = len(self.y)
-            time_length = len(self.y) / self.fs
-            self.x = [(i/x_num_steps)*time_length for i in range(x_num_steps)]
+            self.x = np.arange(len(self.y), dtype=np.float32) / np.float32(self.fs)
 
-            # -- create reduced sample for plotting --
+            # -- create reduced sample for plotting -- (x_sm is built directly, no strided copy of x; it gets warped in place)
             self.y_sm = self.y[::self.app.downsampling_factor_2]
-            self.x_sm = self.x[::self.app.downsampling_factor_2]
+            self.x_sm = np.arange(0, len(self.y), self.app.downsampling_factor_2, dtype=np.float32) / np.float32(self.fs)
 
         except Exception as e:
             messagebox.showerror("Error Message", f"Could not load file: {self.filename}, because: {repr(e)}")
@@ -1284,7 +1269,7 @@ class Data2():
                 x_min_glob (int,float): this is the position of the closest bar to the left, relative to x_from and x_to
                 x_max_glob (int,float): this is the position of the closest bar to the right, relative to x_from and x_to
         """
-        # -- define mappings --
+        # -- define mappings -- (linear interpolation between the knots, see remap_linear)
         # x:       time (sec)
         # f(x), y: time (sec) remapped
         x = [self.app.x_min_glob] + self.app.bars_2.bars + [self.app.x_max_glob] + [x_from]
@@ -1292,16 +1277,13 @@ class Data2():
         x = np.array(x)
         y = np.array(y)
 
-        # -- interpolation methods --
-        f = interp1d(x, y, fill_value='extrapolate')
-
         # -- update data -- (only update data within the relevant range!)
         data = self.x_sm
 
         idx_start = np.searchsorted(data, x_min_glob)
         idx_end = np.searchsorted(data, x_max_glob)
 
-        self.x_sm[idx_start:idx_end] = [f(x) for x in data[idx_start:idx_end]]
+        self.x_sm[idx_start:idx_end] = remap_linear(data[idx_start:idx_end], x, y)
 
 
 class Data3():
@@ -1320,11 +1302,7 @@ class Data3():
 
     def load_chroma_features(self):
         self.fs = self.app.data_1.fs
-        harm = librosa.effects.harmonic(y=self.app.data_1.y, margin=8)
-        chroma_harm = librosa.feature.chroma_cqt(y=harm, sr=self.fs)
-        self.chroma = np.minimum(
-            chroma_harm, librosa.decompose.nn_filter(
-                chroma_harm, aggregate=np.median, metric='cosine'))
+        self.chroma = load_chroma(self.app.data_1.y, self.fs, self.app.data_1.filename, self.hop_length)
 
         x_num_steps = len(self.chroma[0])
         self.x = librosa.frames_to_time(np.arange(x_num_steps + 1), sr=self.fs, hop_length=self.hop_length)
@@ -1346,11 +1324,7 @@ class Data4():
 
     def load_chroma_features(self):
         self.fs = self.app.data_2.fs
-        harm = librosa.effects.harmonic(y=self.app.data_2.y, margin=8)
-        chroma_harm = librosa.feature.chroma_cqt(y=harm, sr=self.fs)
-        self.chroma = np.minimum(
-            chroma_harm, librosa.decompose.nn_filter(
-                chroma_harm, aggregate=np.median, metric='cosine'))
+        self.chroma = load_chroma(self.app.data_2.y, self.fs, self.app.data_2.filename, self.hop_length)
 
         x_num_steps = len(self.chroma[0])
         self.x = librosa.frames_to_time(np.arange(x_num_steps + 1), sr=self.fs, hop_length=self.hop_length)
@@ -1365,7 +1339,7 @@ class Data4():
                 x_min_glob (int,float): this is the position of the closest bar to the left, relative to x_from and x_to
                 x_max_glob (int,float): this is the position of the closest bar to the right, relative to x_from and x_to
         """
-        # -- define mappings --
+        # -- define mappings -- (linear interpolation between the knots, see remap_linear)
         # x:       time (sec)
         # f(x), y: time (sec) remapped
         x = [self.app.x_min_glob] + self.app.bars_2.bars + [self.app.x_max_glob] + [x_from]
@@ -1373,16 +1347,13 @@ class Data4():
         x = np.array(x)
         y = np.array(y)
 
-        # -- interpolation methods --
-        f = interp1d(x, y, fill_value='extrapolate')
-
         # -- update data -- (only update data within the relevant range!)
         data = self.x
 
         idx_start = np.searchsorted(data, x_min_glob)
         idx_end = np.searchsorted(data, x_max_glob)
 
-        self.x[idx_start:idx_end] = [f(x) for x in data[idx_start:idx_end]]
+        self.x[idx_start:idx_end] = remap_linear(data[idx_start:idx_end], x, y)
 
 
 class Data5():
@@ -1417,7 +1388,7 @@ class Data5():
                 x_min_glob (int,float): this is the position of the closest bar to the left, relative to x_from and x_to
                 x_max_glob (int,float): this is the position of the closest bar to the right, relative to x_from and x_to
         """
-        # -- define mappings --
+        # -- define mappings -- (linear interpolation between the knots, see remap_linear)
         # x:       time (sec)
         # f(x), y: time (sec) remapped
         x = [self.app.x_min_glob] + self.app.bars_2.bars + [self.app.x_max_glob] + [x_from]
@@ -1425,14 +1396,11 @@ class Data5():
         x = np.array(x)
         y = np.array(y)
 
-        # -- interpolation methods --
-        f = interp1d(x, y, fill_value='extrapolate')
-
         # -- update data -- (only update data within the relevant range!)
         idx_start = np.searchsorted(self.df_midi["time abs (sec)"], x_min_glob)
         idx_end = np.searchsorted(self.df_midi["time abs (sec)"], x_max_glob)
 
-        self.df_midi.loc[idx_start:idx_end,"time abs (sec)"] = [f(x) for x in self.df_midi.loc[idx_start:idx_end,"time abs (sec)"]]
+        self.df_midi.loc[idx_start:idx_end,"time abs (sec)"] = remap_linear(self.df_midi.loc[idx_start:idx_end,"time abs (sec)"].to_numpy(), x, y)
 
 
 # -------------------------------------------------------------------
@@ -1477,9 +1445,12 @@ class View():
                 c.remove()
         self.canvas.draw()
         
-    def reload_axis(self):
+    def reload_axis(self, idle:bool=False):
         self.axes.set_xlim([self.app.x_min, self.app.x_max])
-        self.canvas.draw()
+        if idle is True:
+            self.canvas.draw_idle() # coalesces repeated requests into one repaint
+        else:
+            self.canvas.draw()
 
     def clear_plot(self):
         self.axes.cla()
@@ -1581,32 +1552,29 @@ class View5(View):
         self.axes.cla()
 
         # -- init variables --
-        segs = []
-        colors = []
-        notes = self.app.data_5.df_midi["note"].unique()
+        df_midi = self.app.data_5.df_midi
+        notes = df_midi["note"].unique()
 
         # -- create colormap --
         my_cmap = plt.get_cmap('viridis')
         norm = Normalize(vmin=0, vmax=127)
         
+        # -- note events grouped by pitch (stable, so every pitch keeps its time order) --
+        df_notes = df_midi[df_midi["type"].isin(["note_on", "note_off"])].dropna()
+        note = df_notes["note"].to_numpy()
+        order = np.argsort(note, kind='stable')
+        note = note[order]
+        is_note_on = (df_notes["type"].to_numpy() == "note_on")[order]
+        time = df_notes["time abs (sec)"].to_numpy(dtype=np.float64)[order]
+        velocity = df_notes["velocity"].to_numpy(dtype=np.float64)[order]
+
+        # -- a note_off ends a note if the previous event of the same pitch is a note_on --
         # Note: We are running into trouble if note on & note off events don't perfectly alternate for a given pitch. 
         #       Unlikely to happen for piano music though.
-        for note in notes:
-            df_note = self.app.data_5.df_midi.where(self.app.data_5.df_midi["note"] == note).dropna()
-            x1, x2, y1, y2, velocity = [None, None, note, note, None]
-            for idx, row in df_note.iterrows():
-                if row["type"] == "note_on":
-                    x1 = row["time abs (sec)"]
-                    velocity = row["velocity"]
-                elif row["type"] == "note_off":
-                    x2 = row["time abs (sec)"]
-                    if x1 is not None:
-                        segs.append(((x1, y1), (x2, y2)))
-                        colors.append(my_cmap(norm(velocity)))
-                        x1 = None
-                        x2 = None
-                else:
-                    continue
+        start = np.flatnonzero(is_note_on[:-1] & ~is_note_on[1:] & (note[:-1] == note[1:]))
+        end = start + 1
+        segs = np.stack([np.column_stack([time[start], note[start]]), np.column_stack([time[end], note[end]])], axis=1)
+        colors = my_cmap(norm(velocity[start]))
 
         ln_coll = matplotlib.collections.LineCollection(segs, colors=colors)
 
@@ -2029,7 +1997,10 @@ class MusicPlayer():
 
     def get_track_len(self) -> None:
         if self.app.data_1.filename:
-            if self.app.data_1.filename[-4:] in [".mp3", ".wav", ".ogg"]:
+            if self.app.data_1.fs is not None and len(self.app.data_1.y) > 0:
+                # -- samples are already decoded, no need to decode the file a second time --
+                self.track_length = len(self.app.data_1.y) / self.app.data_1.fs
+            elif self.app.data_1.filename[-4:] in [".mp3", ".wav", ".ogg"]:
                 self.track_length = mixer.Sound(self.app.data_1.filename).get_length()
             else:
                 print("get_track_len only supports mp3, wav and ogg")
@@ -3,26 +3,930 @@
 # -------------------------------------------------------------------
 
 # -- midi handling --
-import mido
 from mido import MidiFile
 
 # -- utils --
 import pandas as pd
 import numpy as np
 import os
-from typing import Optional
+import sys
+import hashlib
+import importlib.util
+import struct
+import tempfile
+import time
+import argparse
+from typing import Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 
-# -- plotting --
-import matplotlib
-import matplotlib.pyplot as plt
+# -- plotting -- (matplotlib & librosa.display are imported inside the plot_* methods, they are slow to import and only needed there)
 
 # -- dtw --
 import librosa
-import librosa.display
-import libfmp
-import libfmp.c3
-import libfmp.c7
-from scipy.interpolate import interp1d
+import soundfile as sf
+import scipy.fft
+from scipy.spatial.distance import cdist
+from scipy.ndimage import convolve1d, median_filter
+from scipy.signal import resample_poly
+
+# -- jit (optional) --
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE:bool = True
+except ImportError:
+    prange = range
+    NUMBA_AVAILABLE:bool = False
+
+# -- gpu (optional) -- (cupy is slow to import, so it is only looked up here and imported in _cost_matrix_gpu)
+CUPY_AVAILABLE:bool = importlib.util.find_spec("cupy") is not None
+
+# -- librosa's STFT (also used by hpss & cqt) runs on scipy's pocketfft, which can use several threads --
+# (the default since librosa 0.11, where set_fftlib is deprecated, so it is only set for older versions)
+if librosa.get_fftlib() is not scipy.fft:
+    librosa.set_fftlib(scipy.fft)
+
+
+# -----------------------------------------------------------------------------
+# Constants
+# -----------------------------------------------------------------------------
+
+# -- below this length (sec) the chroma features are computed sequentially, the process start-up would cost more than it saves --
+CHROMA_PARALLEL_MIN_SEC:int = 10
+
+# -- below this file size (bytes) the midi tracks are decoded sequentially, starting threads would cost more than it saves --
+MIDI_PARALLEL_MIN_BYTES:int = 1 << 20
+
+# -- threads per FFT (scipy.fft workers, -1: all cores) --
+FFT_WORKERS:int = -1
+
+# -- sample rate of the chroma pipeline (audio at integer multiples of it is downsampled first) --
+CHROMA_SR:int = 11025
+
+# -- decoded audio, chroma features & warping paths are cached here -- (DTW_CACHE_DIR overrides the per-user default, see _default_cache_dir)
+def _default_cache_dir() -> str:
+    """Per-user cache directory of the app: $DTW_CACHE_DIR, else %LOCALAPPDATA%, ~/Library/Caches or $XDG_CACHE_HOME (~/.cache) + /dtw-app."""
+    if os.environ.get("DTW_CACHE_DIR"):
+        return os.environ["DTW_CACHE_DIR"]
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "dtw-app")
+
+CACHE_DIR:str = _default_cache_dir()
+
+# -- the least recently used cache files are deleted beyond this size (bytes, DTW_CACHE_MAX_MB overrides it) --
+CACHE_MAX_BYTES:int = int(os.environ.get("DTW_CACHE_MAX_MB", 2048)) << 20
+
+# -- permissions of new cache files follow the umask (mkstemp would create them with 0600) --
+_UMASK:int = os.umask(0)
+os.umask(_UMASK)
+
+
+# -----------------------------------------------------------------------------
+# Functions
+# -----------------------------------------------------------------------------
+
+def _jit(func=None, **options):
+    """Compiles the function with numba (njit with cache=True and the given options) if it is installed, otherwise returns it unchanged."""
+    if func is None:
+        return lambda func: _jit(func, **options)
+    if NUMBA_AVAILABLE is True:
+        return njit(cache=True, **options)(func)
+    return func
+
+def chroma_pipeline(y:np.ndarray, fs:int, hop_size:int=512, harmonic:bool=True) -> np.ndarray:
+    """
+        Extracts the harmonic chroma features of an audio sequence, smoothed with a median filter over time.
+
+        Args:
+            y (np.ndarray): audio sequence, can be obtained through librosa.load()
+            fs (int): sample rate of the audio sequence
+            hop_size (int): number of samples between two chroma frames
+            harmonic (bool): False: plain chroma of the CQT, without HPSS and median filter (cheaper, for clean recordings)
+        
+        Returns:
+            (np.ndarray): chroma features (12 x frames), float32
+    """
+    # -- downsample to CHROMA_SR -- (the highest CQT bin is ~ 4.1 kHz, below the 5.5 kHz nyquist, hop_size shrinks by the same factor so the frame times stay the same)
+    factor = fs // CHROMA_SR
+    if factor > 1 and fs % CHROMA_SR == 0 and hop_size % factor == 0:
+        y = resample_poly(y, 1, factor).astype(np.float32, copy=False)
+        fs, hop_size = fs // factor, hop_size // factor
+
+    # -- CQT magnitude -- (same CQT as chroma_cqt(y=...) builds: 7 octaves with 3 bins per semitone, estimated tuning)
+    bins_per_octave:int = 36
+    with scipy.fft.set_workers(FFT_WORKERS):
+        cqt = np.abs(librosa.cqt(y=y, sr=fs, hop_length=hop_size, n_bins=7 * bins_per_octave, bins_per_octave=bins_per_octave, tuning=None))
+    if harmonic is False:
+        return librosa.feature.chroma_cqt(C=cqt, sr=fs, hop_length=hop_size, bins_per_octave=bins_per_octave).astype(np.float32, copy=False)
+
+    # -- harmonic part of the CQT magnitude -- (HPSS on the CQT itself, no STFT / inverse STFT round trip)
+    harm, _ = librosa.decompose.hpss(cqt, margin=8)
+    chroma_harm = librosa.feature.chroma_cqt(C=harm, sr=fs, hop_length=hop_size, bins_per_octave=bins_per_octave)
+    # -- median over 9 frames -- (O(T) instead of nn_filter's pairwise cosine distances, same alignment accuracy)
+    chroma = np.minimum(chroma_harm, median_filter(chroma_harm, size=(1, 9)))
+    return chroma.astype(np.float32, copy=False)
+
+@_jit(parallel=True, fastmath=True)
+def _cost_euclid(X:np.ndarray, Y:np.ndarray) -> np.ndarray:
+    """
+        Euclidean distance between all frames of X and Y, rows are computed in parallel.
+
+        Args:
+            X (np.ndarray): chroma features (12 x N)
+            Y (np.ndarray): chroma features (12 x M)
+        
+        Returns:
+            (np.ndarray): cost matrix (N x M), float32
+    """
+    d, n = X.shape
+    m = Y.shape[1]
+    C = np.empty((n, m), dtype=np.float32)
+    for i in prange(n):
+        for j in range(m):
+            acc = 0.0
+            for k in range(d):
+                diff = X[k, i] - Y[k, j]
+                acc += diff * diff
+            C[i, j] = np.sqrt(acc)
+    return C
+
+def _pool_frames(X:np.ndarray, pool:int) -> np.ndarray:
+    """
+        Averages every pool consecutive frames of a feature sequence (the last group may be shorter).
+
+        Args:
+            X (np.ndarray): features (12 x N)
+            pool (int): number of frames per group
+        
+        Returns:
+            (np.ndarray): pooled features (12 x ceil(N / pool)), same dtype as X
+    """
+    if pool <= 1:
+        return X
+    starts = np.arange(0, X.shape[1], pool)
+    counts = np.diff(np.r_[starts, X.shape[1]])
+    return (np.add.reduceat(X, starts, axis=1) / counts).astype(X.dtype, copy=False)
+
+def _cens(X:np.ndarray, ell:int=21, d:int=5) -> np.ndarray:
+    """
+        Chroma energy normalized statistics (CENS) of a chroma feature sequence, downsampled by d.\n
+        Same steps as libfmp.c7.compute_cens_from_chromagram(): l1 normalization, quantization, 
+        smoothing with a hann window of length ell, keeping every d-th frame and l2 normalization.
+
+        Args:
+            X (np.ndarray): chroma features (12 x N)
+            ell (int): length of the smoothing window (frames)
+            d (int): downsampling factor
+        
+        Returns:
+            (np.ndarray): CENS features (12 x ceil(N / d)), float32
+    """
+    X = librosa.util.normalize(X, norm=1, axis=0)
+    X_quant = ((X > 0.4).astype(np.float32) + (X > 0.2) + (X > 0.1) + (X > 0.05))
+    X_smooth = convolve1d(X_quant, np.hanning(ell).astype(np.float32) / ell, axis=1, mode='constant')[:, ::d]
+    return librosa.util.normalize(X_smooth, norm=2, axis=0).astype(np.float32, copy=False)
+
+def _unit_frames(X:np.ndarray) -> np.ndarray:
+    """
+        Scales every frame of a feature sequence to unit length (all-zero frames stay zero).
+
+        Args:
+            X (np.ndarray): features (12 x N)
+        
+        Returns:
+            (np.ndarray): normalized features (12 x N), same dtype as X
+    """
+    return X / np.maximum(np.linalg.norm(X, axis=0, keepdims=True), np.finfo(X.dtype).tiny)
+
+def _cost_matrix(X:np.ndarray, Y:np.ndarray, metric:str='euclidean', gpu:bool=False) -> np.ndarray:
+    """
+        Pairwise cost between the frames of two chroma feature sequences.
+
+        Args:
+            X (np.ndarray): chroma features (12 x N)
+            Y (np.ndarray): chroma features (12 x M)
+            metric (str): 'euclidean' or 'cosine'
+            gpu (bool): compute 'euclidean' / 'cosine' on the GPU with cupy (if it is installed)
+        
+        Returns:
+            (np.ndarray): cost matrix (N x M), float32
+    """
+    if gpu is True and CUPY_AVAILABLE is True and metric in ('euclidean', 'cosine'):
+        return _cost_matrix_gpu(X, Y, metric)
+    if metric == 'cosine':
+        # -- normalized frames: the cosine distance is a single matrix product --
+        return (1.0 - _unit_frames(X).T @ _unit_frames(Y)).astype(np.float32, copy=False)
+    if metric == 'euclidean' and NUMBA_AVAILABLE is True:
+        return _cost_euclid(X, Y)
+    if metric == 'euclidean':
+        # -- ||x-y||² = ||x||² + ||y||² - 2 x·y: one matrix product instead of the pairwise loop --
+        X, Y = X.astype(np.float64, copy=False), Y.astype(np.float64, copy=False) # float64: no cancellation error near zero distance
+        xn = np.einsum('ij,ij->j', X, X)[:, None]
+        yn = np.einsum('ij,ij->j', Y, Y)[None, :]
+        sq = xn + yn - 2.0 * (X.T @ Y)
+        return np.sqrt(np.maximum(sq, 0.0, out=sq), out=sq).astype(np.float32, copy=False)
+    return cdist(X.T, Y.T, metric=metric).astype(np.float32)
+
+def _cost_matrix_gpu(X:np.ndarray, Y:np.ndarray, metric:str='euclidean') -> np.ndarray:
+    """
+        Same as _cost_matrix() for 'euclidean' and 'cosine', but the matrix product runs on the GPU (cupy).
+
+        Args:
+            X (np.ndarray): chroma features (12 x N)
+            Y (np.ndarray): chroma features (12 x M)
+            metric (str): 'euclidean' or 'cosine'
+        
+        Returns:
+            (np.ndarray): cost matrix (N x M), float32
+    """
+    # -- lazy import --
+    import cupy as cp
+
+    X, Y = cp.asarray(X, dtype=cp.float64), cp.asarray(Y, dtype=cp.float64)
+    if metric == 'cosine':
+        X = X / cp.maximum(cp.linalg.norm(X, axis=0, keepdims=True), np.finfo(np.float64).tiny)
+        Y = Y / cp.maximum(cp.linalg.norm(Y, axis=0, keepdims=True), np.finfo(np.float64).tiny)
+        C = 1.0 - X.T @ Y
+    else:
+        C = cp.sqrt(cp.maximum((X * X).sum(axis=0)[:, None] + (Y * Y).sum(axis=0)[None, :] - 2.0 * (X.T @ Y), 0.0))
+    return cp.asnumpy(C.astype(cp.float32))
+
+def _decode_audio(filename:str, sr:int) -> np.ndarray:
+    """
+        Decodes an audio file to mono float32 at sample rate sr.\n
+        Files soundfile can read at sr already are read directly (no librosa / resampler pass), 
+        everything else goes through librosa.load().
+
+        Args:
+            filename (str): filepath of the audio file (.mp3, .wav, ...)
+            sr (int): target sample rate
+        
+        Returns:
+            (np.ndarray): audio sequence (float32)
+    """
+    try:
+        with sf.SoundFile(filename) as f:
+            if f.samplerate == sr and f.channels == 1:
+                # -- mono: decoded straight into the result, no intermediate buffer --
+                y = np.empty(f.frames, dtype=np.float32)
+                return y[:f.buffer_read_into(y, dtype='float32')]
+            if f.samplerate == sr:
+                return f.read(dtype='float32', always_2d=True).mean(axis=1, dtype=np.float32)
+    except RuntimeError:
+        pass # format not supported by soundfile (e.g. mp3 with older libsndfile)
+    y, _ = librosa.load(filename, sr=sr, dtype=np.float32)
+    return y
+
+def _cache_load(cache_file:str, mmap_mode:Optional[str]=None) -> Optional[np.ndarray]:
+    """
+        Loads a cached .npy file from CACHE_DIR.
+
+        Args:
+            cache_file (str): filepath of the cached array
+            mmap_mode (str): see np.load()
+        
+        Returns:
+            (np.ndarray): cached array, None if the file is missing or unreadable (e.g. left truncated by an older version)
+    """
+    if not os.path.exists(cache_file):
+        return None
+    try:
+        arr = np.load(cache_file, mmap_mode=mmap_mode)
+    except (OSError, ValueError, EOFError):
+        return None
+
+    # -- mark as recently used for _cache_evict --
+    try:
+        os.utime(cache_file)
+    except OSError:
+        pass
+    return arr
+
+def _cache_save(cache_file:str, arr:np.ndarray) -> None:
+    """
+        Saves an array to CACHE_DIR atomically: written to a temporary file first and then renamed, 
+        so an interrupted run or a parallel worker never sees a partly written file. Old entries are evicted afterwards (see _cache_evict).
+        The cache is only an optimization: if the file can't be written (disk full, target in use on Windows, ...) it is skipped.
+
+        Args:
+            cache_file (str): filepath of the cached array
+            arr (np.ndarray): array to save
+    """
+    tmp_file:Optional[str] = None
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp_file = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, arr)
+        os.chmod(tmp_file, 0o666 & ~_UMASK)
+        os.replace(tmp_file, cache_file)
+        tmp_file = None
+        _cache_evict()
+    except OSError:
+        pass # not writable (read-only install, .cache is a file, disk full, ...): no caching
+    finally:
+        # -- the temporary file is left over if writing or renaming failed (or was interrupted) --
+        if tmp_file is not None:
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+
+def _cache_evict(max_bytes:Optional[int]=None) -> None:
+    """
+        Deletes the least recently used cache files until CACHE_DIR holds at most max_bytes 
+        (hits refresh the modification time, see _cache_load). Temporary files of interrupted runs older than an hour are deleted too.
+
+        Args:
+            max_bytes (int): size limit of the cache (None: CACHE_MAX_BYTES)
+    """
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    try:
+        with os.scandir(CACHE_DIR) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith((".npy", ".tmp")):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+    except OSError:
+        return
+
+    total = sum(size for _, size, path in entries if path.endswith(".npy"))
+    for mtime, size, path in sorted(entries):
+        stale_tmp = path.endswith(".tmp") and mtime < time.time() - 3600
+        if not stale_tmp and (path.endswith(".tmp") or total <= max_bytes):
+            continue
+        try:
+            os.remove(path) # fails on Windows while the file is memory-mapped, it is retried on the next save
+        except OSError:
+            continue
+        if path.endswith(".npy"):
+            total -= size
+
+def clear_cache() -> None:
+    """Deletes all cached audio, chroma features & warping paths (the files in CACHE_DIR)."""
+    _cache_evict(max_bytes=0)
+
+def load_audio(filename:str, sr:int=22050) -> Tuple[np.ndarray, int]:
+    """
+        Same as librosa.load(), but caches the decoded float32 samples in CACHE_DIR.\n
+        Later loads memory-map the cached .npy instead of decoding the file again (read-only array).
+        The cache key is the path, size and modification time of the file together with sr.
+
+        Args:
+            filename (str): filepath of the audio file (.mp3, .wav, ...)
+            sr (int): target sample rate
+        
+        Returns:
+            (Tuple[np.ndarray, int]): audio sequence (float32) and its sample rate
+    """
+    stat = os.stat(filename)
+    key = hashlib.sha256(f"{os.path.abspath(filename)}:{stat.st_size}:{stat.st_mtime_ns}:{sr}".encode()).hexdigest()
+    cache_file = os.path.join(CACHE_DIR, f"{key}.f32.npy")
+
+    # -- load or decode --
+    y = _cache_load(cache_file, mmap_mode='r')
+    if y is not None:
+        return y, sr
+    y = _decode_audio(filename, sr)
+    _cache_save(cache_file, y)
+    return y, sr
+
+def load_chroma(y:np.ndarray, fs:int, filename:Optional[str]=None, hop_size:int=512, harmonic:bool=True) -> np.ndarray:
+    """
+        Same as chroma_pipeline(), but caches the result in CACHE_DIR.\n
+        Later loads memory-map the cached .npy (read-only array). The cache key is the path, size and modification time 
+        of the audio file together with fs, hop_size and harmonic, so edited files are recomputed without reading them for a hash.
+
+        Args:
+            y (np.ndarray): audio sequence, loaded from filename
+            fs (int): sample rate of the audio sequence
+            filename (str): filepath of the audio file (no caching if None)
+            hop_size (int): number of samples between two chroma frames
+            harmonic (bool): see chroma_pipeline()
+        
+        Returns:
+            (np.ndarray): chroma features (12 x frames), float32
+    """
+    if filename is None:
+        return chroma_pipeline(y, fs, hop_size, harmonic)
+
+    stat = os.stat(filename)
+    key = hashlib.sha256(f"{os.path.abspath(filename)}:{stat.st_size}:{stat.st_mtime_ns}:{fs}:{hop_size}:{'cqt36-hpss-med9' if harmonic is True else 'cqt36'}:{CHROMA_SR}".encode()).hexdigest()
+    cache_file = os.path.join(CACHE_DIR, f"{key}.chroma.npy")
+
+    # -- load or compute --
+    chroma = _cache_load(cache_file, mmap_mode='r')
+    if chroma is not None:
+        return chroma
+    chroma = chroma_pipeline(y, fs, hop_size, harmonic)
+    _cache_save(cache_file, chroma)
+    return chroma
+
+def _path_cost(X:np.ndarray, Y:np.ndarray, wp:np.ndarray) -> float:
+    """
+        Mean cosine distance between the frames a warping path matches.
+
+        Close to 0 if the features of both sequences agree along the path, large for noisy or unrelated features.
+
+        Args:
+            X (np.ndarray): chroma features (12 x N)
+            Y (np.ndarray): chroma features (12 x M)
+            wp (np.ndarray): warping path as (i, j) rows (chroma frames)
+        
+        Returns:
+            (float): mean of 1 - cos(angle) over the cells of the path
+    """
+    wp = np.asarray(wp)
+    x, y = _unit_frames(np.asarray(X)[:, wp[:, 0]]), _unit_frames(np.asarray(Y)[:, wp[:, 1]])
+    return float(np.mean(1.0 - np.einsum('ij,ij->j', x, y)))
+
+def _dtw_band(n:int, m:int, band_rad:Optional[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        Sakoe-Chiba band with the same shape as librosa.util.fill_off_diagonal(), as column range per row.
+
+        Args:
+            n (int): number of rows of the cost matrix
+            m (int): number of columns of the cost matrix
+            band_rad (float): radius of the band as fraction of min(n, m) (no band if None)
+        
+        Returns:
+            (Tuple[np.ndarray, np.ndarray]): row i covers the columns j_lo[i] ... j_hi[i] - 1
+    """
+    if band_rad is None:
+        return np.zeros(n, dtype=np.int64), np.full(n, m, dtype=np.int64)
+    radius = int(np.round(band_rad * min(n, m)))
+    offset = abs(n - m)
+    if n < m:
+        below, above = radius - 1, radius + offset - 1
+    else:
+        below, above = radius + offset - 1, radius - 1
+    i = np.arange(n, dtype=np.int64)
+    return np.maximum(0, i - below), np.minimum(m, i + above + 1)
+
+def _dtw_tube(wp:np.ndarray, factor:int, n:int, m:int, radius:int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        Column range per row around a warping path computed on frames pooled by factor (see _pool_frames), 
+        used to restrict the full resolution DTW to the neighbourhood of a coarse path.
+
+        Args:
+            wp (np.ndarray): coarse warping path as (i, j) rows
+            factor (int): number of frames per coarse frame
+            n (int): number of rows of the full resolution cost matrix
+            m (int): number of columns of the full resolution cost matrix
+            radius (int): number of frames added on both sides of the projected path
+        
+        Returns:
+            (Tuple[np.ndarray, np.ndarray]): row i covers the columns j_lo[i] ... j_hi[i] - 1
+    """
+    # -- columns of the path per coarse row -- (rows the path jumps over span from the previous to the next visited row)
+    n_coarse = int(wp[:, 0].max()) + 1
+    big = np.iinfo(np.int64).max
+    col_min = np.full(n_coarse, big, dtype=np.int64)
+    col_max = np.zeros(n_coarse, dtype=np.int64)
+    np.minimum.at(col_min, wp[:, 0], wp[:, 1])
+    np.maximum.at(col_max, wp[:, 0], wp[:, 1])
+    visited = col_min != big
+    col_min[~visited] = 0
+    col_max[~visited] = big
+    col_min = np.maximum.accumulate(col_min)
+    col_max = np.minimum.accumulate(col_max[::-1])[::-1]
+
+    # -- project to full resolution rows & widen by radius --
+    rows = np.minimum(np.arange(n) // factor, n_coarse - 1)
+    j_lo = col_min[rows] * factor - radius
+    j_hi = (col_max[rows] + 1) * factor + radius
+    return np.clip(j_lo, 0, m), np.clip(j_hi, 0, m)
+
+@_jit
+def _dtw_steps(X:np.ndarray, Y:np.ndarray, cosine:bool, sigma:np.ndarray, weights_add:np.ndarray, j_lo:np.ndarray, j_hi:np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+        Runs the same recurrence as librosa.sequence.dtw, but only keeps the chosen step of every cell.\n
+        The cost of a cell is computed from the frames when it is needed, so the cost matrix is never built.
+        The accumulated cost is held in a ring buffer of the last max(sigma[:, 0]) + 1 rows instead of the full matrix.
+        Only the cells inside the column range of each row (see _dtw_band / _dtw_tube) are computed, 
+        the steps are stored as one strip per row.
+        (librosa also prepends its default steps, but with infinite weights, so they are never chosen.)
+
+        Args:
+            X (np.ndarray): frames of the first sequence (N x 12, C-contiguous), float32
+            Y (np.ndarray): frames of the second sequence (M x 12, C-contiguous), float32
+            cosine (bool): cosine distance 1 - x·y of unit length frames (all-zero frames: 1, like _cost_matrix) instead of euclidean distance
+            sigma (np.ndarray): step sizes (K x 2)
+            weights_add (np.ndarray): additive weight per step (K), float32
+            j_lo (np.ndarray): row i covers the columns j_lo[i] ... j_hi[i] - 1
+            j_hi (np.ndarray): see j_lo
+        
+        Returns:
+            (Tuple[np.ndarray, float]): index of the chosen step for every computed cell (int8, N x width, 
+                column j of row i is stored at j - j_lo[i]) and the total cost of the path.
+    """
+    max_0 = sigma[:, 0].max()
+    max_1 = sigma[:, 1].max()
+    n, d = X.shape
+    m = Y.shape[0]
+    rows = max_0 + 1
+    width = max(1, (j_hi - j_lo).max())
+
+    # -- padded with inf, so steps reaching outside the matrix or the computed cells are never chosen --
+    ring = np.full((rows, m + max_1), np.float32(np.inf), dtype=np.float32)
+    steps = np.zeros((n, width), dtype=np.int8)
+
+    for i in range(n):
+        row = (i + max_0) % rows
+
+        # -- clear what the previous row in this slot wrote --
+        if i >= rows:
+            ring[row, j_lo[i - rows] + max_1:j_hi[i - rows] + max_1] = np.inf
+
+        for j in range(j_lo[i], j_hi[i]):
+            # -- cost of cell (i, j) --
+            acc = 0.0
+            if cosine:
+                for f in range(d):
+                    acc += X[i, f] * Y[j, f]
+                c = np.float32(1.0 - acc)
+            else:
+                for f in range(d):
+                    diff = X[i, f] - Y[j, f]
+                    acc += diff * diff
+                c = np.float32(np.sqrt(acc))
+            if i == 0 and j == 0:
+                ring[row, max_1] = c
+                continue
+
+            # -- every step adds the same cost c, so it is added once after the minimum --
+            best = np.float32(np.inf)
+            best_k = 0
+            for k in range(sigma.shape[0]):
+                cost = ring[(i + max_0 - sigma[k, 0]) % rows, j + max_1 - sigma[k, 1]] + weights_add[k]
+                if cost < best:
+                    best = cost
+                    best_k = k
+            ring[row, j + max_1] = best + c
+            steps[i, j - j_lo[i]] = best_k
+
+    if j_hi[n - 1] < m:
+        return steps, np.float32(np.inf)
+    return steps, ring[(n - 1 + max_0) % rows, m - 1 + max_1]
+
+@_jit
+def _dtw_backtrack(steps:np.ndarray, sigma:np.ndarray, m:int, j_lo:np.ndarray) -> np.ndarray:
+    """
+        Follows the chosen steps from the last cell back to (0, 0).
+
+        Args:
+            steps (np.ndarray): strips of the chosen steps (see _dtw_steps)
+            sigma (np.ndarray): step sizes (K x 2)
+            m (int): number of columns of the cost matrix
+            j_lo (np.ndarray): first computed column of every row (see _dtw_steps)
+
+        Returns:
+            (np.ndarray): warping path as (i, j) rows, starting at the end of both sequences.
+    """
+    # -- every step moves at least one row or column, so the path has less than n + m cells --
+    wp = np.empty((steps.shape[0] + m, 2), dtype=np.int64)
+    i, j = steps.shape[0] - 1, m - 1
+    wp[0, 0], wp[0, 1] = i, j
+    length = 1
+    while i != 0 or j != 0:
+        k = steps[i, j - j_lo[i]]
+        i -= sigma[k, 0]
+        j -= sigma[k, 1]
+        if i < 0 or j < 0:
+            break
+        wp[length, 0], wp[length, 1] = i, j
+        length += 1
+    return wp[:length]
+
+@_jit
+def _remap(x_query:np.ndarray, x_knots:np.ndarray, y_knots:np.ndarray, slopes:np.ndarray) -> np.ndarray:
+    """
+        Piecewise linear interpolation over strictly increasing knots, extrapolating the outer segments.\n
+        Same as scipy's interp1d(..., fill_value='extrapolate').
+
+        Args:
+            x_query (np.ndarray): points in time to remap (1-D)
+            x_knots (np.ndarray): strictly increasing knots
+            y_knots (np.ndarray): values at the knots
+            slopes (np.ndarray): slope of every segment, np.diff(y_knots) / np.diff(x_knots)
+        
+        Returns:
+            (np.ndarray): remapped points in time
+    """
+    out = np.empty(x_query.shape[0], dtype=np.float64)
+    last = x_knots.shape[0] - 1
+    for k in range(x_query.shape[0]):
+        hi = np.searchsorted(x_knots, x_query[k])
+        lo = min(max(hi, 1), last) - 1
+        out[k] = slopes[lo] * (x_query[k] - x_knots[lo]) + y_knots[lo]
+    return out
+
+def remap_linear(x:np.ndarray, x_knots:np.ndarray, y_knots:np.ndarray) -> np.ndarray:
+    """
+        Piecewise linear interpolation through (x_knots, y_knots), extrapolating the outer segments.\n
+        Same as scipy's interp1d(x_knots, y_knots, fill_value='extrapolate')(x), but runs on np.interp. 
+        The knots may be in any order.
+
+        Args:
+            x (array_like): points to remap
+            x_knots (array_like): knots (at least 2)
+            y_knots (array_like): values at the knots
+        
+        Returns:
+            (np.ndarray): remapped points (float64), same shape as x
+    """
+    x = np.asarray(x, dtype=np.float64)
+    order = np.argsort(x_knots, kind='stable')
+    x_knots = np.asarray(x_knots, dtype=np.float64)[order]
+    y_knots = np.asarray(y_knots, dtype=np.float64)[order]
+    out = np.interp(x, x_knots, y_knots)
+
+    # -- np.interp clamps outside the knots, extend the outer segments instead --
+    below, above = x < x_knots[0], x > x_knots[-1]
+    out[below] = y_knots[0] + (x[below] - x_knots[0]) * (y_knots[1] - y_knots[0]) / (x_knots[1] - x_knots[0])
+    out[above] = y_knots[-1] + (x[above] - x_knots[-1]) * (y_knots[-1] - y_knots[-2]) / (x_knots[-1] - x_knots[-2])
+    return out
+
+@_jit(nogil=True)
+def _decode_track(buf:np.ndarray, start:int, end:int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+        Decodes the events of one MTrk chunk (running status included).\n
+        Meta events get the status 0xFF, sysex events 0xF0 / 0xF7, both without data bytes.
+        Data bytes above 127 are clipped to 127 (like mido's clip=True).
+        Raises ValueError on anything else (system common messages, truncated events, ...).
+
+        Args:
+            buf (np.ndarray): file content (uint8)
+            start (int): position of the first event (after the chunk header)
+            end (int): end of the chunk
+        
+        Returns:
+            (np.ndarray): delta time of every event (ticks)
+            (np.ndarray): status byte of every event
+            (np.ndarray): first data byte
+            (np.ndarray): second data byte
+    """
+    # -- every event has at least 2 bytes (delta time + running status data byte) --
+    n_max = (end - start) // 2 + 1
+    delta = np.zeros(n_max, dtype=np.int64)
+    status = np.zeros(n_max, dtype=np.uint8)
+    data_1 = np.zeros(n_max, dtype=np.uint8)
+    data_2 = np.zeros(n_max, dtype=np.uint8)
+
+    n = 0
+    pos = start
+    running = 0
+    while pos < end:
+        # -- delta time (variable length quantity) --
+        t = 0
+        while True:
+            if pos >= end:
+                raise ValueError("truncated delta time")
+            byte = buf[pos]
+            pos += 1
+            t = (t << 7) | (byte & 0x7F)
+            if byte < 0x80:
+                break
+        if pos >= end:
+            raise ValueError("truncated event")
+
+        # -- status byte -- (data byte: running status; meta events keep the running status)
+        st = buf[pos]
+        if st >= 0x80:
+            pos += 1
+            if st != 0xFF:
+                running = st
+        elif running >= 0x80 and running < 0xF0:
+            st = running
+        else:
+            raise ValueError("running status without a previous channel message")
+
+        delta[n] = t
+        status[n] = st
+        if st == 0xFF or st == 0xF0 or st == 0xF7:
+            # -- meta / sysex: skip (meta type) + length + data --
+            if st == 0xFF:
+                pos += 1
+            length = 0
+            while True:
+                if pos >= end:
+                    raise ValueError("truncated meta / sysex length")
+                byte = buf[pos]
+                pos += 1
+                length = (length << 7) | (byte & 0x7F)
+                if byte < 0x80:
+                    break
+            pos += length
+            if pos > end:
+                raise ValueError("truncated meta / sysex data")
+        elif st < 0xF0:
+            # -- channel message: program change & channel pressure have one data byte --
+            n_data = 1 if (st & 0xF0) == 0xC0 or (st & 0xF0) == 0xD0 else 2
+            if pos + n_data > end:
+                raise ValueError("truncated channel message")
+            data_1[n] = min(buf[pos], 127)
+            if n_data == 2:
+                data_2[n] = min(buf[pos + 1], 127)
+            pos += n_data
+        else:
+            raise ValueError("unsupported system message")
+        n += 1
+    return delta[:n], status[:n], data_1[:n], data_2[:n]
+
+def _read_smf(filename:str) -> Tuple[int, list]:
+    """
+        Parses a standard midi file into numpy arrays, one tuple (delta, status, data_1, data_2) per track (see _decode_track()).
+
+        Args:
+            filename (str): filepath of the midi file
+        
+        Returns:
+            (int): ticks per beat
+            (list): decoded tracks
+    """
+    with open(filename, "rb") as f:
+        raw = f.read()
+    name, size = struct.unpack(">4sL", raw[:8])
+    if name != b"MThd" or size < 6:
+        raise ValueError("MThd not found")
+    _, num_tracks, ticks_per_beat = struct.unpack(">hhh", raw[8:14])
+
+    # -- locate the track chunks --
+    chunks = []
+    pos:int = 8 + size
+    for _ in range(num_tracks):
+        name, size = struct.unpack(">4sL", raw[pos:pos + 8])
+        if name != b"MTrk" or pos + 8 + size > len(raw):
+            raise ValueError("MTrk not found")
+        chunks.append((pos + 8, pos + 8 + size))
+        pos += 8 + size
+
+    # -- decode -- (large files: tracks in parallel threads, the decoder releases the GIL)
+    buf = np.frombuffer(raw, dtype=np.uint8)
+    if len(raw) < MIDI_PARALLEL_MIN_BYTES or len(chunks) < 2:
+        return ticks_per_beat, [_decode_track(buf, start, end) for start, end in chunks]
+    with ThreadPoolExecutor() as executor:
+        return ticks_per_beat, list(executor.map(lambda chunk: _decode_track(buf, *chunk), chunks))
+
+def _read_mido(filename:str) -> Tuple[int, list]:
+    """
+        Same as _read_smf(), but parsed by mido (slower, handles every kind of message).
+
+        Args:
+            filename (str): filepath of the midi file
+        
+        Returns:
+            (int): ticks per beat
+            (list): decoded tracks
+    """
+    mid = MidiFile(filename, clip=True)
+    tracks = []
+    for track in mid.tracks:
+        delta = np.zeros(len(track), dtype=np.int64)
+        status = np.zeros(len(track), dtype=np.uint8)
+        data_1 = np.zeros(len(track), dtype=np.uint8)
+        data_2 = np.zeros(len(track), dtype=np.uint8)
+        for i, msg in enumerate(track):
+            delta[i] = msg.time
+            if msg.is_meta:
+                status[i] = 0xFF
+            elif msg.type == 'sysex':
+                status[i] = 0xF0
+            else:
+                msg_bytes = msg.bytes()
+                status[i] = msg_bytes[0]
+                if len(msg_bytes) > 1:
+                    data_1[i] = msg_bytes[1]
+                if len(msg_bytes) > 2:
+                    data_2[i] = msg_bytes[2]
+        tracks.append((delta, status, data_1, data_2))
+    return mid.ticks_per_beat, tracks
+
+def _read_midi(filename:str) -> Tuple[int, list]:
+    """
+        Parses a midi file into numpy arrays, reusing the result of earlier calls as long as the file is unchanged (same size & modification time).\n
+        The returned arrays are shared between callers and must not be modified.
+
+        Args:
+            filename (str): filepath of the midi file
+        
+        Returns:
+            (int): ticks per beat
+            (list): one tuple (delta, status, data_1, data_2) of np.ndarrays per track
+    """
+    stat = os.stat(filename)
+    return _read_midi_cached(os.path.abspath(filename), stat.st_size, stat.st_mtime_ns)
+
+@lru_cache(maxsize=16)
+def _read_midi_cached(filename:str, size:int, mtime_ns:int) -> Tuple[int, list]:
+    """Cached part of _read_midi(), size & mtime_ns are only part of the cache key."""
+    # -- byte level parser (numba) for plain files, mido for everything else --
+    if NUMBA_AVAILABLE is True:
+        try:
+            return _read_smf(filename)
+        except (ValueError, struct.error):
+            pass
+    return _read_mido(filename)
+
+@_jit
+def _encode_events(status:np.ndarray, data_1:np.ndarray, data_2:np.ndarray, ticks:np.ndarray) -> np.ndarray:
+    """
+        Encodes channel messages into MTrk event bytes: delta time as variable length quantity followed by the 3 message bytes.
+
+        Args:
+            status (np.ndarray): status byte of every message (e.g. 0x90 | channel for note_on)
+            data_1 (np.ndarray): first data byte (note)
+            data_2 (np.ndarray): second data byte (velocity)
+            ticks (np.ndarray): delta time of every message (ticks, 0 ... 0x0FFFFFFF)
+        
+        Returns:
+            (np.ndarray): event bytes (uint8)
+    """
+    # -- at most 4 bytes delta time + 3 bytes message per event --
+    out = np.empty(ticks.shape[0] * 7, dtype=np.uint8)
+    pos = 0
+    for i in range(ticks.shape[0]):
+        # -- delta time, 7 bit groups, most significant first --
+        t = ticks[i]
+        n_bytes = 1
+        while t >> (7 * n_bytes):
+            n_bytes += 1
+        for b in range(n_bytes - 1, 0, -1):
+            out[pos] = 0x80 | ((t >> (7 * b)) & 0x7F)
+            pos += 1
+        out[pos] = t & 0x7F
+        out[pos + 1] = status[i]
+        out[pos + 2] = data_1[i]
+        out[pos + 3] = data_2[i]
+        pos += 4
+    return out[:pos]
+
+def _encode_track(status:np.ndarray, data_1:np.ndarray, data_2:np.ndarray, ticks:np.ndarray) -> bytes:
+    """
+        Encodes channel messages into a complete MTrk chunk (including the end of track meta message).
+
+        Args:
+            status (np.ndarray): status byte of every message (e.g. 0x90 | channel for note_on)
+            data_1 (np.ndarray): first data byte (note)
+            data_2 (np.ndarray): second data byte (velocity)
+            ticks (np.ndarray): delta time of every message (ticks, 0 ... 0x0FFFFFFF)
+        
+        Returns:
+            (bytes): MTrk chunk
+    """
+    body = _encode_events(status.astype(np.int64), data_1.astype(np.int64), data_2.astype(np.int64), ticks.astype(np.int64)).tobytes()
+    body += b"\x00\xff\x2f\x00"
+    return b"MTrk" + struct.pack(">I", len(body)) + body
+
+def align_files(file_x:str, file_y:str, adaptive:bool=False) -> pd.DataFrame:
+    """
+        Aligns two audio files via DTW (no midi, no plots).
+
+        Args:
+            file_x (str): filepath of the baseline audio file
+            file_y (str): filepath of the audio file to be warped
+            adaptive (bool): try the plain chroma first (see DTW.compute_dtw_adaptive)
+        
+        Returns:
+            (pd.DataFrame): time mappings in seconds (columns: wav_original, wav_from_midi)
+    """
+    x_raw, fs = load_audio(file_x)
+    y_raw, fs = load_audio(file_y, fs)
+    dtw_obj = DTW(x_raw=x_raw, y_raw=y_raw, fs=fs, df_midi=None, file_x=file_x, file_y=file_y)
+    dtw_obj.interactive = False
+
+    # -- sequential chroma features, align_batch() already runs one process per pair --
+    for harmonic in ([False, True] if adaptive is True else [True]):
+        dtw_obj.x_chroma = load_chroma(x_raw, fs, file_x, dtw_obj.hop_size, harmonic)
+        dtw_obj.y_chroma = load_chroma(y_raw, fs, file_y, dtw_obj.hop_size, harmonic)
+        dtw_obj.compute_dtw()
+        if harmonic is False and _path_cost(dtw_obj.x_chroma, dtw_obj.y_chroma, dtw_obj.wp) <= dtw_obj.adaptive_tol:
+            break
+    return dtw_obj.df_mappings
+
+def align_batch(pairs:list, max_workers:Optional[int]=None, adaptive:bool=False) -> list:
+    """
+        Same as align_files() for many pairs of audio files, one worker process per pair.
+
+        Args:
+            pairs (list): (file_x, file_y) tuples
+            max_workers (int): number of worker processes (None: number of cores)
+            adaptive (bool): see align_files()
+        
+        Returns:
+            (list): time mappings of every pair (pd.DataFrame), in the order of pairs
+    """
+    if len(pairs) == 0:
+        return []
+    files_x, files_y = zip(*pairs)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(align_files, files_x, files_y, [adaptive] * len(pairs)))
 
 
 # -----------------------------------------------------------------------------
@@ -30,7 +934,10 @@ from scipy.interpolate import interp1d
 # -----------------------------------------------------------------------------
 
 class DTW:
-    def __init__(self, x_raw, y_raw, fs, df_midi) -> None:
+    # -- plot_* methods return immediately if False (batch runs) --
+    interactive:bool = True
+
+    def __init__(self, x_raw, y_raw, fs, df_midi, file_x:Optional[str]=None, file_y:Optional[str]=None) -> None:
         """
             Dynamic time warp object. Holds all the data. Extracts chroma features, computes warping path and applies it to the midi.
 
@@ -39,72 +946,212 @@ class DTW:
                 y_raw: can be obtained through librosa.load()
                 fs: 
                 df_midi: can be obtained through MidiIO.midi_to_df()
+                file_x (str): filepath x_raw was loaded from (enables the chroma cache)
+                file_y (str): filepath y_raw was loaded from (enables the chroma cache)
         """
         # -- load data --
         self.x_raw = x_raw
         self.y_raw = y_raw
         self.fs = fs
         self.df_midi = df_midi
+        self.file_x = file_x
+        self.file_y = file_y
 
         # -- dtw params & weights --
         self.hop_size:int = 512
         self.sigma:Optional[np.array] = np.array([[1,1], [3,4], [4,3], [2,3], [3,2], [1,2], [2,1], [1,3], [3,1], [1,4], [4,1]])
         self.weights_add:Optional[list] = [1.0, 1.625, 1.625, 1.8, 1.8, 2.25, 2.25, 2.7, 2.7, 2.875, 2.875]
+        self.metric:str = 'euclidean' # cost between chroma frames: 'euclidean' or 'cosine'
+        self.band_rad:Optional[float] = 0.25 # Sakoe-Chiba band radius as fraction of the shorter sequence (None: no band)
+        self.pool:int = 1 # number of chroma frames averaged before DTW (path resolution becomes pool * hop_size)
+        self.cens:Optional[int] = None # align CENS features downsampled by this factor instead of the chroma features (None: chroma)
+        self.cens_ell:int = 21 # length of the CENS smoothing window (chroma frames)
+        self.coarse:Optional[int] = None # two pass DTW: first pass on frames pooled by this factor (None: single pass)
+        self.coarse_rad:int = 10 # two pass DTW: the second pass covers this many frames around the first path
+
+        # -- accumulated cost matrix -- (only computed when plotted)
+        self.D:Optional[np.ndarray] = None
+
+        # -- adaptive features -- (compute_dtw_adaptive: plain chroma first, harmonic chroma only if the mean cosine distance along the path is above this)
+        # on synthetic chord sequences clean pairs stay below 0.005, pairs with noise bursts or unrelated content are above 0.02
+        self.adaptive_tol:float = 0.01
+
+        # -- full cost matrices on the GPU -- (cupy, only where one is built: plotting & the librosa fallback)
+        self.gpu:bool = False
 
     # -- transform --
     
-    def compute_chroma_features(self) -> None:
-        x_harm = librosa.effects.harmonic(y=self.x_raw, margin=8)
-        x_chroma_harm = librosa.feature.chroma_cqt(y=x_harm, sr=self.fs)
-        self.x_chroma = np.minimum(
-            x_chroma_harm, librosa.decompose.nn_filter(
-                x_chroma_harm, aggregate=np.median, metric='cosine'))
-
-        y_harm = librosa.effects.harmonic(y=self.y_raw, margin=8)
-        y_chroma_harm = librosa.feature.chroma_cqt(y=y_harm, sr=self.fs)
-        self.y_chroma = np.minimum(
-            y_chroma_harm, librosa.decompose.nn_filter(
-                y_chroma_harm, aggregate=np.median, metric='cosine'))
+    def compute_chroma_features(self, harmonic:bool=True) -> None:
+        # -- short sequences: not worth starting worker processes --
+        if min(len(self.x_raw), len(self.y_raw)) < self.fs * CHROMA_PARALLEL_MIN_SEC:
+            self.x_chroma = load_chroma(self.x_raw, self.fs, self.file_x, self.hop_size, harmonic)
+            self.y_chroma = load_chroma(self.y_raw, self.fs, self.file_y, self.hop_size, harmonic)
+            return
+
+        # -- both sequences are independent, compute them in parallel --
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            x_future = executor.submit(load_chroma, self.x_raw, self.fs, self.file_x, self.hop_size, harmonic)
+            y_future = executor.submit(load_chroma, self.y_raw, self.fs, self.file_y, self.hop_size, harmonic)
+            self.x_chroma = x_future.result()
+            self.y_chroma = y_future.result()
 
     # -- compute --
     
+    def compute_dtw_adaptive(self) -> None:
+        """
+            Computes the chroma features & DTW, trying the cheap plain chroma first (see chroma_pipeline).
+
+            The harmonic chroma (HPSS & median filter) is only computed if the features along the first path differ by more than 
+            self.adaptive_tol (mean cosine distance, see _path_cost).
+        """
+        self.compute_chroma_features(harmonic=False)
+        self.compute_dtw()
+        if _path_cost(self.x_chroma, self.y_chroma, self.wp) <= self.adaptive_tol:
+            return
+        self.compute_chroma_features()
+        self.compute_dtw()
+
     def compute_dtw(self) -> None:
-        # -- create cost matrix --
-        C_FMP = libfmp.c3.compute_cost_matrix(self.x_chroma, self.y_chroma, 'euclidean')
+        # -- features --
+        x, y, factor = self._dtw_features()
+        n, m = x.shape[1], y.shape[1]
+
+        # -- compute DTW -- (only the warping path is kept, the accumulated cost matrix is computed on demand for plotting)
+        self.D = None
+        cache_file = self._wp_cache_file(x, y, factor)
+        self.wp = _cache_load(cache_file) if cache_file is not None else None
+        if self.wp is None:
+            if self.coarse is None:
+                self.wp = self._warping_path(x, y, *_dtw_band(n, m, self.band_rad))
+            else:
+                # -- coarse pass on frames pooled by another factor self.coarse, the full pass only covers a tube around its path --
+                x_coarse, y_coarse = _pool_frames(x, self.coarse), _pool_frames(y, self.coarse)
+                wp_coarse = self._warping_path(x_coarse, y_coarse, *_dtw_band(x_coarse.shape[1], y_coarse.shape[1], self.band_rad))
+                self.wp = self._warping_path(x, y, *_dtw_tube(wp_coarse, self.coarse, n, m, self.coarse_rad))
+            self.wp = np.asarray(self.wp) * factor # back to chroma frames
+            if cache_file is not None:
+                _cache_save(cache_file, self.wp)
+        self.wp_s = self.wp.astype(np.float32) * np.float32(self.hop_size / self.fs) # float32 like the chroma features
+
+        # -- place in df -- (in ascending time, reversed once on the array)
+        self.df_mappings = pd.DataFrame(self.wp_s[::-1].copy(), columns=["wav_original", "wav_from_midi"])
+
+    def _dtw_features(self) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+            Features the DTW runs on: the chroma features or their CENS (if self.cens is set), pooled by self.pool.
+
+            Returns:
+                (Tuple[np.ndarray, np.ndarray, int]): features of x & y and the number of chroma frames per feature frame
+        """
+        x, y, factor = self.x_chroma, self.y_chroma, 1
+        if self.cens is not None:
+            x, y, factor = _cens(x, self.cens_ell, self.cens), _cens(y, self.cens_ell, self.cens), self.cens
+        return _pool_frames(x, self.pool), _pool_frames(y, self.pool), factor * self.pool
+
+    def _wp_cache_file(self, x:np.ndarray, y:np.ndarray, factor:int) -> Optional[str]:
+        """
+            Location of the cached warping path in CACHE_DIR, keyed by the SHA-256 of the features and all DTW parameters.\n
+            Only used if both audio files are known (file_x, file_y), like the chroma feature cache.
+
+            Args:
+                x (np.ndarray): features of x (see _dtw_features)
+                y (np.ndarray): features of y
+                factor (int): number of chroma frames per feature frame
+            
+            Returns:
+                (str): filepath of the cached warping path (None: no caching)
+        """
+        if self.file_x is None or self.file_y is None:
+            return None
+        sha = hashlib.sha256()
+        sha.update(np.ascontiguousarray(x).tobytes())
+        sha.update(np.ascontiguousarray(y).tobytes())
+        params = (x.shape, y.shape, factor, np.asarray(self.sigma).tolist(), list(self.weights_add), 
+            self.metric, self.band_rad, self.coarse, self.coarse_rad, "cosine-1-dot") # last entry: kernel version, bump when paths change
+        sha.update(repr(params).encode())
+        return os.path.join(CACHE_DIR, f"{sha.hexdigest()}.wp.npy")
+
+    def _warping_path(self, x:np.ndarray, y:np.ndarray, j_lo:np.ndarray, j_hi:np.ndarray) -> np.ndarray:
+        """
+            Computes the DTW warping path between two feature sequences over the given column range of every row.
+
+            Args:
+                x (np.ndarray): features (12 x N)
+                y (np.ndarray): features (12 x M)
+                j_lo (np.ndarray): row i covers the columns j_lo[i] ... j_hi[i] - 1 (see _dtw_band / _dtw_tube)
+                j_hi (np.ndarray): see j_lo
+            
+            Returns:
+                (np.ndarray): warping path as (i, j) rows, starting at the end of both sequences.
+        """
+        sigma = np.asarray(self.sigma, dtype=np.int64)
+        if sigma.ndim != 2 or sigma.shape[1] != 2 or (sigma < 0).any() or (sigma.sum(axis=1) == 0).any():
+            raise ValueError("step sizes (sigma) must be (K x 2) non-negative steps, each moving at least one row or column")
 
-        # -- compute DTW --
-        self.D, self.wp = librosa.sequence.dtw(C=C_FMP, step_sizes_sigma=self.sigma, metric="euclidian", weights_add=self.weights_add)
-        self.wp_s = np.asarray(self.wp) * self.hop_size / self.fs
+        # -- jitted kernel if numba is available -- (cost computed inside the recurrence, frame by frame)
+        if NUMBA_AVAILABLE is True and self.metric in ('euclidean', 'cosine'):
+            if self.metric == 'cosine':
+                x, y = _unit_frames(x), _unit_frames(y)
+            steps, total_cost = _dtw_steps(np.ascontiguousarray(x.T, dtype=np.float32), np.ascontiguousarray(y.T, dtype=np.float32), 
+                self.metric == 'cosine', sigma, np.asarray(self.weights_add, dtype=np.float32), j_lo, j_hi)
+            if np.isinf(total_cost):
+                raise ValueError("No valid warping path could be constructed with the given step sizes.")
+            wp = _dtw_backtrack(steps, sigma, y.shape[1], j_lo)
+            if tuple(wp[-1]) != (0, 0):
+                raise ValueError("Unable to compute a full DTW warping path.")
+            return wp
 
-        # -- place in df --
-        self.df_mappings = pd.DataFrame(self.wp_s, columns=["wav_original", "wav_from_midi"])
-        self.df_mappings = self.df_mappings.reindex(index=self.df_mappings.index[::-1])
-        self.df_mappings.reset_index(inplace=True, drop=True)
+        # -- librosa otherwise -- (cells outside the column ranges set to inf, like fill_off_diagonal does for the band)
+        C = _cost_matrix(x, y, self.metric, self.gpu)
+        cols = np.arange(C.shape[1])
+        C = np.where((cols >= j_lo[:, None]) & (cols < j_hi[:, None]), C, np.inf)
+        _, wp = librosa.sequence.dtw(C=C, step_sizes_sigma=self.sigma, weights_add=self.weights_add)
+        return np.asarray(wp)
 
     def compute_remap_function(self) -> None:
         """
             Returns a function that remaps any arbitrary point in time from the midi & wav_from_midi to match the original audio sequence.
         """
-        # -- drop duplicates --
-        df_mappings = self.df_mappings[["wav_from_midi", "wav_original"]].drop_duplicates(subset=["wav_from_midi"], keep="first")
-
         # -- define mappings --
         # x:       time (sec)
         # f(x), y: time (sec) remapped
-        x = df_mappings["wav_from_midi"]
-        y = df_mappings["wav_original"]
-        x = np.array(x)
-        y = np.array(y)
+        # the path is monotone, so duplicates of x are adjacent: keeping the first of every run needs no sort
+        wp_s = self.wp_s[::-1]
+        keep = np.empty(len(wp_s), dtype=bool)
+        keep[:1] = True
+        np.not_equal(wp_s[1:, 1], wp_s[:-1, 1], out=keep[1:])
+        self.x_knots = wp_s[keep, 1]
+        self.y_knots = wp_s[keep, 0]
+
+        self.slopes = np.diff(self.y_knots) / np.diff(self.x_knots)
+
+        # -- interpolation method --
+        self.f = self.remap
+
+    def remap(self, x) -> np.ndarray:
+        """
+            Remaps points in time from the midi & wav_from_midi to match the original audio sequence (see compute_remap_function).
+
+            Args:
+                x (array_like): points in time (sec)
+            
+            Returns:
+                (np.ndarray): remapped points in time (sec), same shape as x
+        """
+        x = np.asarray(x, dtype=np.float64)
+        if NUMBA_AVAILABLE is True:
+            return _remap(x.ravel(), self.x_knots, self.y_knots, self.slopes).reshape(x.shape)
 
-        # -- interpolation methods --
-        self.f = interp1d(x, y, fill_value='extrapolate')
+        # -- vectorized otherwise -- (same arithmetic as _remap, one searchsorted over all points)
+        lo = np.clip(np.searchsorted(self.x_knots, x), 1, len(self.x_knots) - 1) - 1
+        return self.slopes[lo] * (x - self.x_knots[lo]) + self.y_knots[lo]
 
     def compute_remapped_midi(self) -> None:
         """
             Adds a column to self.df_midi with a warped/remapped time for each event.
         """
         # -- apply remapping --
-        self.df_midi["time abs (sec) remapped"] = [self.f(x) for x in self.df_midi["time abs (sec)"]]
+        self.df_midi["time abs (sec) remapped"] = self.f(self.df_midi["time abs (sec)"].to_numpy())
 
     # -- plot graphs --
 
@@ -113,6 +1160,14 @@ class DTW:
             Plots both original .wav audio sequences below each other.\n
             Draws lines between both sequences to represent the mappings.
         """
+        if self.interactive is False:
+            return
+
+        # -- lazy imports --
+        import matplotlib.collections
+        import matplotlib.pyplot as plt
+        import librosa.display
+
         # -- init plot --
         fig = plt.figure(figsize=(16, 8))
 
@@ -131,24 +1186,18 @@ class DTW:
         plt.tight_layout()
 
         trans_figure = fig.transFigure.inverted()
-        lines = []
         arrows = 30
         points_idx = np.int16(np.round(np.linspace(0, self.wp.shape[0] - 1, arrows)))
 
-        # -- generates list with mappings --
-        for tp1, tp2 in self.wp[points_idx] * self.hop_size / self.fs:
-            # get position on axis for a given index-pair
-            coord1 = trans_figure.transform(ax1.transData.transform([tp1, 0]))
-            coord2 = trans_figure.transform(ax2.transData.transform([tp2, 0]))
+        # -- position on axis for all index-pairs at once --
+        tp = self.wp[points_idx] * self.hop_size / self.fs
+        zeros = np.zeros(len(tp))
+        coords1 = trans_figure.transform(ax1.transData.transform(np.column_stack((tp[:, 0], zeros))))
+        coords2 = trans_figure.transform(ax2.transData.transform(np.column_stack((tp[:, 1], zeros))))
 
-            # draw a line
-            line = matplotlib.lines.Line2D((coord1[0], coord2[0]),
-                                        (coord1[1], coord2[1]),
-                                        transform=fig.transFigure,
-                                        color='r')
-            lines.append(line)
-
-        fig.lines = lines
+        # -- all mappings as one artist --
+        lines = matplotlib.collections.LineCollection(np.stack((coords1, coords2), axis=1), transform=fig.transFigure, colors='r')
+        fig.add_artist(lines)
         plt.tight_layout()
         plt.show()
 
@@ -156,6 +1205,13 @@ class DTW:
         """
             Plots the chroma features of .wav sequences below each other.
         """
+        if self.interactive is False:
+            return
+
+        # -- lazy imports --
+        import matplotlib.pyplot as plt
+        import librosa.display
+
         plt.figure(figsize=(16, 8))
 
         plt.subplot(2, 1, 1)
@@ -175,31 +1231,46 @@ class DTW:
         """
             Shows the warping path on top of the accumulated cost matrix.
         """
+        if self.interactive is False:
+            return
+
+        # -- lazy imports --
+        import matplotlib.pyplot as plt
+
+        # -- accumulated cost matrix is not kept by compute_dtw --
+        if self.D is None:
+            x, y, _ = self._dtw_features()
+            C = _cost_matrix(x, y, self.metric, self.gpu)
+            self.D, _ = librosa.sequence.dtw(C=C, step_sizes_sigma=self.sigma, weights_add=self.weights_add, 
+                global_constraints=self.band_rad is not None, band_rad=self.band_rad or 0.25)
+
         fig = plt.figure(figsize=(10, 10))
         ax = fig.add_subplot(111)
-        librosa.display.specshow(self.D, x_axis='time', y_axis='time',
-                                cmap='gray_r', hop_length=self.hop_size)
-        imax = ax.imshow(self.D, cmap=plt.get_cmap('gray_r'),
-                        origin='lower', interpolation='nearest', aspect='auto')
+        # -- single raster pass, extent in seconds so the path (self.wp_s) lines up --
+        frame_sec = (self.cens or 1) * self.pool * self.hop_size / self.fs
+        extent = (0, self.D.shape[1] * frame_sec, 0, self.D.shape[0] * frame_sec)
+        imax = ax.imshow(self.D, cmap=plt.get_cmap('gray_r'), extent=extent,
+                        origin='lower', interpolation='nearest', aspect='auto', rasterized=True)
         ax.plot(self.wp_s[:, 1], self.wp_s[:, 0], marker='o', color='r')
+        ax.set_xlabel('Time (sec)')
+        ax.set_ylabel('Time (sec)')
         plt.title('Warping Path on Acc. Cost Matrix $self.D$')
-        plt.colorbar()
+        plt.colorbar(imax)
         plt.show()
 
     def plot_remap_function(self) -> None:
         """
             Shows the function that remaps any arbitrary point in time from the midi & wav_from_midi to match the original audio sequence.
         """
-        # -- drop duplicates --
-        df_mappings = self.df_mappings[["wav_from_midi", "wav_original"]].drop_duplicates(subset=["wav_from_midi"], keep="first")
+        if self.interactive is False:
+            return
 
-        # -- define mappings --
-        # x:       time (sec)
-        # f(x), y: time (sec) remapped
-        x = df_mappings["wav_from_midi"]
-        y = df_mappings["wav_original"]
-        x = np.array(x)
-        y = np.array(y)
+        # -- lazy imports --
+        import matplotlib.pyplot as plt
+
+        # -- mappings -- (computed in compute_remap_function)
+        x = self.x_knots
+        y = self.y_knots
 
         # -- generate plot --
         plt.plot(x, y, 'o', x, self.f(x), '--')
@@ -225,46 +1296,45 @@ class MidiIO:
             Returns:
                 (pd.DataFrame): contains all midi note events inside a dataframe. 
         """
-        mid = MidiFile(file_midi, clip=True)
-        ticks_per_beat = mid.ticks_per_beat
-        df = pd.DataFrame(None, columns=[
-            "type", "channel", "track", "ticks_per_beat", "note", "velocity", 
-            "time delta (tick)", "time abs (tick)", "time delta (sec)", "time abs (sec)"])
-        for track_num, track in enumerate(mid.tracks):
-            time_abs = 0
-            for msg in track:
-                try:
-                    time_abs += msg.time
-                    df = df.append(
-                        {
-                            "type":           msg.type,
-                            "channel":        msg.channel,
-                            "track":          track_num,
-                            "ticks_per_beat": ticks_per_beat,
-                            "note":           msg.note,
-                            "velocity":       msg.velocity,
-                            "time delta (tick)": msg.time,
-                            "time abs (tick)":   time_abs,
-                        },
-                        ignore_index=True
-                    )
-                except Exception:
-                    pass
-        
+        ticks_per_beat, tracks = _read_midi(file_midi)
+
+        # -- absolute time per track, then all tracks concatenated --
+        delta = np.concatenate([t[0] for t in tracks] + [np.zeros(0, dtype=np.int64)])
+        time_abs = np.concatenate([np.cumsum(t[0]) for t in tracks] + [np.zeros(0, dtype=np.int64)])
+        status = np.concatenate([t[1] for t in tracks] + [np.zeros(0, dtype=np.uint8)])
+        data_1 = np.concatenate([t[2] for t in tracks] + [np.zeros(0, dtype=np.uint8)])
+        data_2 = np.concatenate([t[3] for t in tracks] + [np.zeros(0, dtype=np.uint8)])
+        track_id = np.repeat(np.arange(len(tracks), dtype=np.int16), [len(t[0]) for t in tracks])
+
+        # -- select note events -- (note as int16, so note +/- 1 around 0 and 127 cannot overflow)
+        kind = status & 0xF0
+        is_note = (kind == 0x80) | (kind == 0x90)
+
+        df = pd.DataFrame({
+            "type": np.where(kind[is_note] == 0x90, 'note_on', 'note_off'), 
+            "channel": (status[is_note] & 0x0F).astype(np.int8), 
+            "track": track_id[is_note], 
+            "ticks_per_beat": np.full(int(is_note.sum()), ticks_per_beat, dtype=np.int32), 
+            "note": data_1[is_note].astype(np.int16), 
+            "velocity": data_2[is_note].astype(np.int16), # int16 like note, scaled velocities must not wrap around before export clips them
+            "time delta (tick)": delta[is_note].astype(np.int32), 
+            "time abs (tick)": time_abs[is_note]})
+
         if clip_t0 is True:
-            shift_ticks_by = df["time abs (tick)"][0]
-            df["time abs (tick)"] = [x - shift_ticks_by for x in df["time abs (tick)"]]
-        
-        df["time delta (sec)"] = [mido.tick2second(tick=x, ticks_per_beat=ticks_per_beat, tempo=500000) for x in df["time delta (tick)"]]
-        df["time abs (sec)"] = [mido.tick2second(tick=x, ticks_per_beat=ticks_per_beat, tempo=500000) for x in df["time abs (tick)"]]
+            df["time abs (tick)"] -= df["time abs (tick)"].iat[0]
+
+        # -- convert ticks to seconds -- (same formula as mido.tick2second)
+        sec_per_tick:float = 500000 * 1e-6 / ticks_per_beat
+        df["time delta (sec)"] = df["time delta (tick)"].to_numpy(dtype=np.float64) * sec_per_tick
+        df["time abs (sec)"] = df["time abs (tick)"].to_numpy(dtype=np.float64) * sec_per_tick
 
         if mark_velocity_0_as_note_off is True:
-            df.type = pd.Series(['note_off' if x == 0 else 'note_on' for x in df.velocity])
+            df["type"] = np.where(df["velocity"].to_numpy() == 0, 'note_off', 'note_on')
 
         return df
 
     @staticmethod
-    def export_midi(df_midi:pd.DataFrame, outfile:str, time_colname:str="time (sec) remapped") -> None:
+    def export_midi(df_midi:pd.DataFrame, outfile:str, time_colname:str="time abs (sec) remapped", drop_overlaps:bool=True) -> None:
         """
             Writes a midi file based on a pd.DataFrame containing midi events.
 
@@ -272,41 +1342,153 @@ class MidiIO:
                 df_midi (pd.DataFrame): needs to contain the following columns: type, channel, note, velocity
                 outfile (str): name of the filepath where the midi should be written to
                 time_colname (str): name of the column containing the time of the event (in seconds)
+                drop_overlaps (bool): should overlapping notes of the same pitch & channel be merged into one note? (see MidiIO._overlap_mask)
             
             Comments:
-                currently writes all events into track 0
+                currently writes all events into track 0, sorted by time
         """
         # -- global tempo --
         tempo:int = 500000
         ticks_per_beat:int = 96 # set to a higher value to reduce rounding errors
 
-        # -- init midi --
-        file = MidiFile()
-        track = mido.MidiTrack()
-        file.tracks.append(track)
-        file.ticks_per_beat = ticks_per_beat
+        # -- check input --
+        missing = [col for col in ["type", "channel", "note", "velocity", time_colname] if col not in df_midi.columns]
+        if len(missing) > 0:
+            raise ValueError(f"df_midi is missing the column(s): {missing}")
+        times = np.ascontiguousarray(df_midi[time_colname].to_numpy(dtype=np.float64))
+        if not np.isfinite(times).all():
+            print("Error in self.df_midi row: {row_id}".format(row_id=df_midi.index[np.argmin(np.isfinite(times))]))
+            raise ValueError(f"column '{time_colname}' contains NaN or infinite times")
 
-        # -- append note events --
-        time_t0:float = 0.0
-        for row_id, row in df_midi.iterrows():
-            try:
-                t:int = round(mido.second2tick(second=row[time_colname]-time_t0, ticks_per_beat=ticks_per_beat, tempo=tempo))
-                msg = mido.Message(row['type'], channel=row['channel'], note=row['note'], velocity=row['velocity'], time=t)
-                track.append(msg)
-                time_t0 = row[time_colname]
-            except Exception as e:
-                print("Error in self.df_midi row: {row_id}".format(row_id=row_id))
-                raise e
+        # -- delta times in ticks -- (same scale as mido.second2tick, absolute times are rounded so errors don't add up)
+        ticks_abs = np.rint(times / (tempo * 1e-6 / ticks_per_beat)).astype(np.int64)
+        is_note_on = df_midi['type'].to_numpy() == 'note_on'
+
+        # -- notes shorter than a tick last one tick -- (otherwise the note_off would be sorted before its own note_on below)
+        # per channel & pitch in time order: a note_off on the same tick as the last note_on before it is moved one tick later
+        key = df_midi['channel'].to_numpy(dtype=np.int64) * 128 + df_midi['note'].to_numpy(dtype=np.int64)
+        group_order = np.lexsort((times, key))
+        key_sorted = key[group_order]
+        group_id = np.cumsum(np.r_[True, key_sorted[1:] != key_sorted[:-1]])
+        offset = group_id * (ticks_abs.max(initial=0) + 2) # keeps the running maximum inside every group
+        last_on = np.maximum.accumulate(np.where(is_note_on[group_order], ticks_abs[group_order], -1) + offset) - offset
+        zero_length = ~is_note_on[group_order] & (last_on == ticks_abs[group_order])
+        ticks_abs[group_order[zero_length]] += 1
+
+        # -- sort events by tick, note_off before note_on on the same tick, then by time --
+        # lexsort is stable, so simultaneous events keep their order (the tracks of midi_to_df come one after another)
+        order = np.lexsort((times, is_note_on, ticks_abs))
+        ticks_abs = ticks_abs[order]
+        ticks = np.diff(ticks_abs, prepend=0)
+
+        # -- message bytes --
+        row_ids = df_midi.index.to_numpy()[order]
+        msg_types = df_midi['type'].to_numpy()[order]
+        channel = df_midi['channel'].to_numpy(dtype=np.int64)[order]
+        note = df_midi['note'].to_numpy(dtype=np.int64)[order]
+        velocity = np.clip(df_midi['velocity'].to_numpy(dtype=np.int64)[order], 0, 127) # e.g. scaled velocities
+        is_note_on = is_note_on[order]
+        status = np.where(is_note_on, 0x90, 0x80) | channel
 
-        # -- save file --
-        file.save(outfile)
+        # -- overlapping notes of the same pitch --
+        if drop_overlaps is True:
+            keep = MidiIO._overlap_mask(is_note_on, channel, note, ticks_abs)
+            ticks = np.diff(ticks_abs[keep], prepend=0)
+            row_ids, msg_types, channel, note, velocity, is_note_on, status = (
+                row_ids[keep], msg_types[keep], channel[keep], note[keep], velocity[keep], is_note_on[keep], status[keep])
+
+        # -- same checks mido.Message would do --
+        invalid = ~(is_note_on | (msg_types == 'note_off')) | (channel < 0) | (channel > 15) | (note < 0) | (note > 127) | (ticks < 0) | (ticks > 0x0FFFFFFF)
+        if invalid.any():
+            print("Error in self.df_midi row: {row_id}".format(row_id=row_ids[np.argmax(invalid)]))
+            raise ValueError("only note_on / note_off events with channel 0..15, note 0..127 and non-negative times can be exported")
+
+        # -- save file -- (header: type 1, one track)
+        with open(outfile, "wb") as f:
+            f.write(b"MThd" + struct.pack(">IHHH", 6, 1, 1, ticks_per_beat) + _encode_track(status, note, velocity, ticks))
+
+    @staticmethod
+    def _overlap_mask(is_note_on:np.ndarray, channel:np.ndarray, note:np.ndarray, ticks_abs:np.ndarray) -> np.ndarray:
+        """
+            Finds the events to keep so that no pitch is switched on twice on the same channel (MIDI can't express that).\n
+            Counts the sounding notes per channel & pitch over the time sorted events: a note_on is kept only if nothing
+            is sounding yet and a note_off only if it ends the last sounding note, so overlapping notes are merged into one.
+            note_offs without a sounding note (duplicate or orphan releases) are dropped.
+
+            Args:
+                is_note_on (np.ndarray): True for note_on, False for note_off events (sorted by time)
+                channel (np.ndarray): channel of every event
+                note (np.ndarray): pitch of every event
+                ticks_abs (np.ndarray): absolute time of every event (ticks)
+            
+            Returns:
+                (np.ndarray): boolean mask of the events to keep
+        """
+        if len(note) == 0:
+            return np.ones(0, dtype=bool)
+
+        # -- group by channel & pitch, in time order inside every group (a note_off ends a note before a note_on at the same tick starts the next) --
+        group_order = np.lexsort((is_note_on, ticks_abs, note, channel))
+        step = np.where(is_note_on[group_order], 1, -1)
+
+        # -- number of sounding notes after each event, per group --
+        depth = np.cumsum(step)
+        key = channel[group_order] * 128 + note[group_order]
+        group_start = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+        group_len = np.diff(np.r_[group_start, len(key)])
+        group_id = np.repeat(np.arange(len(group_start)), group_len)
+        depth -= np.repeat(depth[group_start] - step[group_start], group_len)
+
+        # -- never below zero -- (a duplicate or orphan note_off must not cancel the following notes)
+        # clamped count = depth - min(0, running minimum of depth), the offset keeps the running minimum inside every group
+        offset = group_id * (2 * len(key) + 2)
+        run_min = np.minimum.accumulate(depth - offset) + offset
+        depth -= np.minimum(run_min, 0)
+        depth_before = np.r_[0, depth[:-1]]
+        depth_before[group_start] = 0
+
+        keep = np.empty(len(note), dtype=bool)
+        keep[group_order] = np.where(step == 1, depth == 1, depth_before == 1)
+        return keep
+
+    @staticmethod
+    def _scale_midi(mid:MidiFile, factor:float) -> MidiFile:
+        """
+            Scales the timing of all messages of a midi file in place.\n
+            The absolute times are scaled and rounded, so rounding errors do not add up over the track.
+
+            Args:
+                mid (MidiFile): midi file to scale
+                factor (float): time scaling factor (> 1.0 slows the midi down)
+            
+            Returns:
+                (MidiFile): the same midi file
+        """
+        for track in mid.tracks:
+            time_abs:int = 0
+            time_abs_scaled:int = 0
+            for msg in track:
+                time_abs += msg.time
+                t:int = round(time_abs * factor)
+                msg.time = t - time_abs_scaled
+                time_abs_scaled = t
+        return mid
 
     @staticmethod
     def copy_midi(midi_in_file:str, midi_out_file:str, tempo_factor:float=1.0) -> None:
+        """
+            Copies a midi file, scaling the timing of all messages by tempo_factor.\n
+            Works directly on the parsed midi file, without a DataFrame round trip.
+
+            Args:
+                midi_in_file (str): filepath of the midi file to read
+                midi_out_file (str): filepath of the midi file to write
+                tempo_factor (float): time scaling factor (> 1.0 slows the midi down)
+        """
         print("reading midi")
-        df_midi = MidiIO.midi_to_df(file_midi=midi_in_file, clip_t0=False)
+        mid = MidiFile(midi_in_file, clip=True)
         print("writing midi")
-        MidiIO.export_midi(df_midi=df_midi, outfile=midi_out_file, time_colname="time abs (sec)")
+        MidiIO._scale_midi(mid, tempo_factor).save(midi_out_file)
         print("done")
 
 # -----------------------------------------------------------------------------
@@ -319,7 +1501,11 @@ if __name__ == "__main__":
     # DTW Example
     # -------------------------------------------------------------------------
 
-    # Step 0: file location
+    # Step 0: command line arguments & file location
+    parser = argparse.ArgumentParser(description="Aligns a midi file with an audio recording via DTW.")
+    parser.add_argument("--plot", action="store_true", help="show the inspection plots")
+    args = parser.parse_args()
+
     try:
         data_dir = os.path.dirname(__file__)
     except NameError:
@@ -329,32 +1515,36 @@ if __name__ == "__main__":
         file_wav_from_midi = os.path.join(data_dir, 'wav_files', 'audio_from_midi_file_before.wav')
         file_midi          = os.path.join(data_dir, 'midi_files', 'midi_file_before.mid')
 
-    # Step 1: load data
-    print(f"Loading {file_wav_original} ...")
-    x_raw, fs = librosa.load(file_wav_original)
-    print(f"Loading {file_wav_from_midi} ...")
-    y_raw, fs = librosa.load(file_wav_from_midi)
-    print(f"Loading {file_midi} ...")
-    df_midi:pd.DataFrame = MidiIO.midi_to_df(file_midi=file_midi)
+    # Step 1: load data (in parallel threads, decoding releases the GIL)
+    print(f"Loading {file_wav_original}, {file_wav_from_midi} & {file_midi} ...")
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        x_future = executor.submit(load_audio, file_wav_original)
+        y_future = executor.submit(load_audio, file_wav_from_midi)
+        midi_future = executor.submit(MidiIO.midi_to_df, file_midi=file_midi)
+        x_raw, fs = x_future.result()
+        y_raw, fs = y_future.result()
+        df_midi:pd.DataFrame = midi_future.result()
 
     # Step 2: compute DTW time mappings
-    dtw_obj = DTW(x_raw=x_raw, y_raw=y_raw, fs=fs, df_midi=df_midi)
+    dtw_obj = DTW(x_raw=x_raw, y_raw=y_raw, fs=fs, df_midi=df_midi, file_x=file_wav_original, file_y=file_wav_from_midi)
     dtw_obj.compute_chroma_features()
     dtw_obj.compute_dtw()
     dtw_obj.compute_remap_function()
 
     # Step 3: Inspect some plots
-    dtw_obj.plot_chroma_features()
-    dtw_obj.plot_dtw_mappings()
-    dtw_obj.plot_remap_function()
-    dtw_obj.plot_warping_path()
+    dtw_obj.interactive = args.plot
+    if args.plot is True:
+        dtw_obj.plot_chroma_features()
+        dtw_obj.plot_dtw_mappings()
+        dtw_obj.plot_remap_function()
+        dtw_obj.plot_warping_path()
 
     # Step 4: Apply DTW time mappings
     dtw_obj.compute_remapped_midi()
 
     # Step 5: Write midi
     outfile = os.path.join(data_dir, 'midi_files', 'midi_file_after.mid')
-    MidiIO.export_midi(df_midi=dtw_obj.df_midi, outfile=outfile, time_colname="time (sec) remapped")
+    MidiIO.export_midi(df_midi=dtw_obj.df_midi, outfile=outfile, time_colname="time abs (sec) remapped")
 
     # -------------------------------------------------------------------------
     # Example of: MIDI -> DF -> MIDI (roundtrip)
@@ -0,0 +1,156 @@
+# -------------------------------------------------------------------
+# Imports
+# -------------------------------------------------------------------
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import librosa
+import soundfile as sf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import dtw
+from dtw import DTW, MidiIO, chroma_pipeline, load_audio, load_chroma
+
+
+# -------------------------------------------------------------------
+# Chroma features
+# -------------------------------------------------------------------
+
+def _tones(notes:list, sr:int=22050) -> np.ndarray:
+    """One second of a sine tone per note."""
+    t = np.arange(sr) / sr
+    return np.concatenate([np.sin(2 * np.pi * librosa.note_to_hz(note) * t) for note in notes]).astype(np.float32)
+
+def _pitch_classes(chroma:np.ndarray, n:int) -> list:
+    """Strongest pitch class in the middle half of each of the n equally long segments."""
+    f = chroma.shape[1] // n
+    return [int(np.argmax(chroma[:, i*f + f//4:i*f + 3*f//4].mean(axis=1))) for i in range(n)]
+
+def test_chroma_pitch_classes():
+    # -- octaves fold onto the same pitch class --
+    y = _tones(["C4", "E4", "G4", "A4", "C5", "E5", "G5", "A5"])
+    for harmonic in [True, False]:
+        assert _pitch_classes(chroma_pipeline(y, 22050, harmonic=harmonic), 8) == [0, 4, 7, 9, 0, 4, 7, 9]
+
+
+# -------------------------------------------------------------------
+# Midi export
+# -------------------------------------------------------------------
+
+def _export_notes(tmp_path, events:list, drop_overlaps:bool=True) -> list:
+    """Writes (type, time) events of C4 on channel 0 and returns the (type, time) note events read back from the file."""
+    df_midi = pd.DataFrame({
+        "type": [msg_type for msg_type, _ in events],
+        "channel": 0,
+        "note": 60,
+        "velocity": [64 if msg_type == "note_on" else 0 for msg_type, _ in events],
+        "time abs (sec)": [time for _, time in events],
+    })
+    outfile = str(tmp_path / "out.mid")
+    MidiIO.export_midi(df_midi, outfile, time_colname="time abs (sec)", drop_overlaps=drop_overlaps)
+    df_out = MidiIO.midi_to_df(outfile, clip_t0=False)
+    return list(zip(df_out["type"], df_out["time abs (sec)"].round(3)))
+
+def test_export_duplicate_note_off(tmp_path):
+    # -- the second release of the first note must not drop the later notes --
+    events = [("note_on", 0.0), ("note_off", 0.5), ("note_off", 0.5), 
+              ("note_on", 1.0), ("note_off", 1.5), ("note_on", 2.0), ("note_off", 2.5)]
+    assert _export_notes(tmp_path, events) == [
+        ("note_on", 0.0), ("note_off", 0.5), ("note_on", 1.0), ("note_off", 1.5), ("note_on", 2.0), ("note_off", 2.5)]
+
+def test_export_orphan_note_off(tmp_path):
+    events = [("note_off", 0.0), ("note_on", 1.0), ("note_off", 1.5)]
+    assert _export_notes(tmp_path, events) == [("note_on", 1.0), ("note_off", 1.5)]
+
+def test_export_zero_length_note(tmp_path):
+    # -- a note shorter than a tick is written as on / off, one tick long --
+    events = [("note_on", 1.0), ("note_off", 1.001), ("note_on", 2.0), ("note_off", 2.5)]
+    for drop_overlaps in [True, False]:
+        assert _export_notes(tmp_path, events, drop_overlaps) == [
+            ("note_on", 1.0), ("note_off", 1.005), ("note_on", 2.0), ("note_off", 2.5)]
+
+
+# -------------------------------------------------------------------
+# Cache
+# -------------------------------------------------------------------
+
+def _unwritable_cache(tmp_path, monkeypatch) -> str:
+    """Points CACHE_DIR below a regular file (can't be created) and returns the path of a short test recording."""
+    (tmp_path / "blocked").write_text("")
+    monkeypatch.setattr(dtw, "CACHE_DIR", str(tmp_path / "blocked" / "cache"))
+    filename = str(tmp_path / "tones.wav")
+    sf.write(filename, _tones(["C4", "E4", "G4"]), 22050)
+    return filename
+
+def test_load_audio_unwritable_cache(tmp_path, monkeypatch):
+    # -- the cache is only an optimization, the audio is decoded anyway --
+    filename = _unwritable_cache(tmp_path, monkeypatch)
+    y, sr = load_audio(filename)
+    assert sr == 22050
+    assert np.allclose(y, sf.read(filename, dtype="float32")[0])
+
+def test_load_chroma_unwritable_cache(tmp_path, monkeypatch):
+    filename = _unwritable_cache(tmp_path, monkeypatch)
+    y, sr = load_audio(filename)
+    assert np.allclose(load_chroma(y, sr, filename), chroma_pipeline(y, sr))
+
+    # -- same through the DTW object --
+    dtw_obj = DTW(x_raw=y, y_raw=y, fs=sr, df_midi=None, file_x=filename, file_y=filename)
+    dtw_obj.compute_chroma_features()
+    assert dtw_obj.x_chroma.shape == dtw_obj.y_chroma.shape == (12, 1 + len(y) // 512)
+
+def test_compute_dtw_unwritable_cache(tmp_path, monkeypatch):
+    # -- the warping path is kept even though it can't be cached --
+    filename = _unwritable_cache(tmp_path, monkeypatch)
+    y, sr = load_audio(filename)
+    dtw_obj = DTW(x_raw=y, y_raw=y, fs=sr, df_midi=None, file_x=filename, file_y=filename)
+    dtw_obj.compute_chroma_features()
+    dtw_obj.compute_dtw()
+    assert tuple(dtw_obj.wp[0]) == (dtw_obj.x_chroma.shape[1] - 1, dtw_obj.y_chroma.shape[1] - 1)
+    assert tuple(dtw_obj.wp[-1]) == (0, 0)
+
+def test_cache_eviction(tmp_path, monkeypatch):
+    # -- least recently used entries are deleted beyond CACHE_MAX_BYTES, files follow the umask --
+    monkeypatch.setattr(dtw, "CACHE_DIR", str(tmp_path))
+    arr = np.zeros(1000, dtype=np.float32)
+    monkeypatch.setattr(dtw, "CACHE_MAX_BYTES", 2 * (arr.nbytes + 128))
+    for i, name in enumerate(["a.npy", "b.npy"]):
+        dtw._cache_save(str(tmp_path / name), arr)
+        os.utime(tmp_path / name, (i, i))
+    assert dtw._cache_load(str(tmp_path / "a.npy")) is not None # a is now the most recently used one
+    dtw._cache_save(str(tmp_path / "c.npy"), arr)
+    assert sorted(os.listdir(tmp_path)) == ["a.npy", "c.npy"]
+    assert os.stat(tmp_path / "c.npy").st_mode & 0o777 == 0o666 & ~dtw._UMASK
+
+    dtw.clear_cache()
+    assert os.listdir(tmp_path) == []
+
+
+# -------------------------------------------------------------------
+# DTW
+# -------------------------------------------------------------------
+
+def test_dtw_path_longer_than_rows():
+    # -- with horizontal steps the path has more cells than x has frames --
+    rng = np.random.default_rng(0)
+    x, y = rng.random((12, 40)).astype(np.float32), rng.random((12, 120)).astype(np.float32)
+    dtw_obj = DTW(x_raw=None, y_raw=None, fs=22050, df_midi=None)
+    dtw_obj.sigma, dtw_obj.weights_add, dtw_obj.band_rad = np.array([[1, 1], [0, 1], [1, 0]]), np.zeros(3), None
+    wp = dtw_obj._warping_path(x, y, *dtw._dtw_band(40, 120, None))
+    _, wp_librosa = librosa.sequence.dtw(C=dtw._cost_matrix(x, y), step_sizes_sigma=dtw_obj.sigma, weights_add=dtw_obj.weights_add)
+    assert len(wp) > 40
+    assert np.array_equal(wp, wp_librosa)
+
+def test_scaled_velocity(tmp_path):
+    # -- scaling the velocity column must not wrap around, export clips it to 127 --
+    df_midi = pd.DataFrame({"type": ["note_on", "note_off"], "channel": 0, "note": 60, "velocity": [100, 0], "time abs (sec)": [0.0, 1.0]})
+    infile, outfile = str(tmp_path / "in.mid"), str(tmp_path / "out.mid")
+    MidiIO.export_midi(df_midi, infile, time_colname="time abs (sec)")
+    df_in = MidiIO.midi_to_df(infile)
+    df_in["velocity"] *= 2
+    assert df_in["velocity"].tolist() == [200, 0]
+    MidiIO.export_midi(df_in, outfile, time_colname="time abs (sec)")
+    assert MidiIO.midi_to_df(outfile)["velocity"].tolist() == [127, 0]